@@ -2,6 +2,7 @@
 #Class: 5th Hour
 #Assignment: HW-R6
 
+from running_stats import RunningStats
 
 #1. Create a def function that prints out "Hello World!". Call the function.
 def hello_world():
@@ -12,8 +13,10 @@ def name(name):
     print(name)
 name("Bryson")
 #3. Create a def function that calculates the average of a list. Call the function with the list as the argument.
+#Takes the numbers one by one (num(1, 2, 3)) or one list/generator/array of them (num(range(10**9))).
 def num(*num):
-    avg = sum(num) / len(num)
+    values = num[0] if len(num) == 1 and hasattr(num[0], "__iter__") else num
+    avg = RunningStats().update(values).mean
     print(avg)
 num(2,32,54,61)
 #4. Call the function from #3 but with a new list of different numbers.
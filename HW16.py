@@ -25,12 +25,15 @@ def repeat(num):
 
 #6. Create a variable x that has the value of 2. Print x
 x= 2
-print(x)
 #7. Create a def function that multiplies the value of 2 by a random number between 1 and 5.
 def multy():
     global x
     x = x*random.randint(1,5)
     print(x)
-multy()
-#8. Print the new value of x.
-print(x)
\ No newline at end of file
+
+#The prints and the multy() call only happen when HW16 is run, not when HW19 imports from it.
+if __name__ == "__main__":
+    print(x)
+    multy()
+    #8. Print the new value of x.
+    print(x)
@@ -2,36 +2,37 @@
 #Class: 5th Hour
 #Assignment: HW17
 import random
+from rps_engine import outcome
 #1. Create a def function that plays a single round of rock, paper, scissors where the user inputs
 #1 for rock, 2 for paper, or 3 for scissors and compares it to a random number generated to serve
 #as the "opponent's hand".
 
 #2. Create a def function that prompts the user to input if they want to play another round, and
 #repeats the RPS def function if they do or exits the code if they don't.
+#The result comes from rps_engine's win/lose/draw table, and play() keeps asking in a loop instead of
+#the two functions calling each other, so any number of rounds is fine.
 def rock_paper_scissors():
     players_rps=int(input("Enter rock (1) paper (2) or scissors (3):"))
     computer = random.randint(1, 3)
     print(computer)
-    if computer == players_rps:
-        print("It's a draw!")
-    elif computer == 1 and players_rps == 2:
-        print("you win!")
-    elif computer == 2 and players_rps == 1:
-        print("you lose!")
-    elif computer == 3 and players_rps == 2:
-        print("you lose!")
-    elif computer == 2 and players_rps == 3:
-        print("you win!")
-    elif computer== 3 and players_rps == 1:
-        print("you win!")
-    elif computer == 1 and players_rps== 3:
-        print("you lose!")
-    restart_game()
+    if players_rps in (1, 2, 3):
+        result = outcome(players_rps - 1, computer - 1)
+        if result == 0:
+            print("It's a draw!")
+        elif result == 1:
+            print("you win!")
+        else:
+            print("you lose!")
 def restart_game():
     restart= input("Do you want to restart game? (y/n) ")
     if restart == "y" or restart == "Y":
-        rock_paper_scissors()
+        return True
     else:
         print("Thank you for playing!")
-        exit()
-rock_paper_scissors()
\ No newline at end of file
+        return False
+def play():
+    while True:
+        rock_paper_scissors()
+        if not restart_game():
+            break
+play()
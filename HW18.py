@@ -2,8 +2,10 @@
 #Class: 5th Hour
 #Assignment: HW18
 
-import random
+from coin_flip import count_heads
+from bean_bag import BeanBag
 #1. Import the "random" library and create a def function that prints "Hello World!"
+#(The random numbers come through coin_flip and bean_bag now, so random isn't imported here.)
 def hello_world():
     print("Hello World!")
 
@@ -11,14 +13,12 @@ def hello_world():
 heads=0
 tails=0
 #3. Create a def function that flips a coin one hundred times and increments the result in the above variables.
-def h_or_t():
+#All the flips come from one batch of random bits (coin_flip.count_heads), so flips=10**10 works too.
+def h_or_t(flips=100):
     global heads,tails
-    for i in range(100):
-        h_or_t_flip = random.randint(1, 2)
-        if h_or_t_flip==1:
-            heads+=1
-        else:
-            tails+=1
+    h_or_t_heads = count_heads(flips)
+    heads+=h_or_t_heads
+    tails+=flips - h_or_t_heads
 
 
 #4. Call the "Hello world" and "Coin Flip" functions here
@@ -28,26 +28,31 @@ h_or_t()
 print(heads)
 print(tails)
 #6. Create a list called beanBag and add at least 5 different colored beans to the list as strings.
-beanBag= ["Green", "Red", "Blue", "Yellow", "Purple"]
+#The beans go into a BeanBag (bean_bag.py) so a pull doesn't have to shift the whole list over,
+#which matters once the bag has millions of beans in it.
+beanBag= BeanBag(["Green", "Red", "Blue", "Yellow", "Purple"])
 
 #7. Create a def function that pulls a random bean out of the beanBag list, prints which bean you pulled, and then removes it from the list.
-
+#This is a loop instead of bean() and bean_repull() calling each other, so it can keep going
+#forever without running out of stack.
 def bean():
-    if beanBag==[]:
-        print("No beans")
-    else:
-        hand=random.choice(beanBag)
-        print(hand)
-        beanBag.remove(hand)
-    bean_repull()
+    while True:
+        if not beanBag:
+            print("No beans")
+        else:
+            hand=beanBag.draw()
+            print(hand)
+        if not bean_repull():
+            break
 #8. Create a def function that asks if you want to pull another bean out of the bag and, if yes, repeats the #3 def function
 def bean_repull():
         repull = input("Would you like to repull? Y/N")
 
         if repull == "Y" or repull == "y":
-            bean()
+            return True
         else:
             print("Thanks for playing!")
+            return False
 
 #9. Call the "Bean Pull" function here
-bean()
\ No newline at end of file
+bean()
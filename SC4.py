@@ -18,5 +18,8 @@ def stat_block():
         statblock.sort(reverse=True)
         stat= statblock[0]+statblock[1]+statblock[2]
         stat_results.append(stat)
-stat_block()
-print(stat_results)
\ No newline at end of file
+
+#Only roll when SC4 is run itself, so SC5 can import stat_block without rolling a block on import.
+if __name__ == "__main__":
+    stat_block()
+    print(stat_results)
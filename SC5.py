@@ -4,14 +4,17 @@
 
 #Import all of SC4 here
 from SC4 import *
+from running_stats import RunningStats
 
 listAverage = 0
 
 def final_average():
     global listAverage
-    listAverage =  sum(stat_results)/len(stat_results)   #Calculate the sum of the list by the length of the list here
+    listAverage = RunningStats().update(stat_results).mean   #One pass, works for any list or stream of stats
     return listAverage
 
-final_average()
-
-print(listAverage)
\ No newline at end of file
+if __name__ == "__main__":
+    stat_block()
+    print(stat_results)
+    final_average()
+    print(listAverage)
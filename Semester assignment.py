@@ -4,6 +4,7 @@
 
 import random
 import time
+from dice import Dice
 
 #Due to weird time travelling circumstances beyond explanation, you find yourself in 2018 or so
 #working for Larian Studios. Currently, they are working on the early prototypes of the hype
@@ -18,13 +19,13 @@ partyDict = {
         "Init" : 1,
         "AC" : 17,
         "AtkMod": 6,
-        "Damage" : random.randint(1,6) + random.randint(1,6) + 3
+        "Damage" : Dice("2d6+3")
     },
     "Shadowheart" : {
         "HP" : 40,
         "Init" : 1,
         "AtkMod": 4,
-        "Damage" : random.randint(1,6) + 3,
+        "Damage" : Dice("1d6+3"),
         "AC" : 18,
     },
     "Gale" : {
@@ -32,14 +33,14 @@ partyDict = {
         "Init" : 1,
         "AC" : 14,
         "AtkMod": 6,
-        "Damage" : random.randint(1,10) + random.randint(1,10),
+        "Damage" : Dice("2d10"),
     },
     "Astarion" : {
         "HP" : 40,
         "Init" : 3,
         "AC" : 14,
         "AtkMod": 5,
-        "Damage" : random.randint(1,8) + random.randint(1,6) + 4,
+        "Damage" : Dice("1d8+1d6+4"),
     }
 }
 
@@ -49,35 +50,35 @@ enemyDict = {
         "Init" : 0,
         "AC" : 12,
         "AtkMod": 4,
-        "Damage" : random.randint(1,6) + 2
+        "Damage" : Dice("1d6+2")
     },
     "Orc": {
         "HP" : 15,
         "Init": 1,
         "AC" : 13,
         "AtkMod": 5,
-        "Damage" : random.randint(1,12) + 3
+        "Damage" : Dice("1d12+3")
     },
     "Troll": {
         "HP" : 84,
         "Init": 1,
         "AC" : 15,
         "AtkMod": 7,
-        "Damage" : random.randint(1,6) + random.randint(1,6) + 4
+        "Damage" : Dice("2d6+4")
     },
     "Mindflayer": {
         "HP" : 71,
         "Init": 1,
         "AC" : 15,
         "AtkMod": 7,
-        "Damage" : random.randint(1,10) + random.randint(1,10) + 4
+        "Damage" : Dice("2d10+4")
     },
     "Dragon": {
         "HP" : 127,
         "Init": 2,
         "AC" : 18,
         "AtkMod": 7,
-        "Damage" : random.randint(1,10) + random.randint(1,10) + random.randint(1,8) + 4
+        "Damage" : Dice("2d10+1d8+4")
     },
 }
 
@@ -102,7 +103,7 @@ villain_health = (enemyDict["Dragon"]["HP"]) + (enemyDict["Dragon"]["AC"])
 #the character deals double damage. If the d20 rolled to attack is an unmodified ("natural") 1,
 #the attack automatically misses
 hero_atk_roll= random.randint(1,20)
-hero_damage_roll= (partyDict["Astarion"]["Damage"] + partyDict["Astarion"]["AtkMod"])
+hero_damage_roll= (partyDict["Astarion"]["Damage"].roll() + partyDict["Astarion"]["AtkMod"])
 while villain_health > 0:
     if hero_atk_roll == 20:
         print("Automatic hit, that's a critical")
@@ -118,7 +119,7 @@ print(villain_health - hero_damage_roll)
 
 hero_health = (partyDict["Astarion"]["HP"]) + (partyDict["Astarion"]["AC"])
 villain_atk_roll = random.randint(1,20)
-villain_damage_roll = (enemyDict["Dragon"]["Damage"] + enemyDict["Dragon"]["AtkMod"])
+villain_damage_roll = (enemyDict["Dragon"]["Damage"].roll() + enemyDict["Dragon"]["AtkMod"])
 
 while hero_health > 0:
     if hero_atk_roll == 20:
@@ -0,0 +1,153 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - adaptive sampling
+
+#Runs duels in growing batches and stops as soon as the answer is good enough, instead of
+#always running a fixed number. Lopsided matchups (Gale vs the Dragon) stop after a few hundred
+#duels and the close ones get the rest of the budget. Two ways to stop:
+# - "width": the Wilson confidence interval for the win rate is narrower than `width`.
+# - "decide": a sequential probability ratio test (SPRT) has decided whether the hero wins more
+#   or less than half the time. The width rule still applies, for matchups sitting right at 50%.
+#Batches use replay.KeyedStream and keep counting fight numbers up, so a run is reproducible and
+#any single fight in it can be replayed.
+
+import argparse
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+
+import numpy as np
+
+from duel_engine import simulate_duels
+from matchup_matrix import MatchupMatrix, cell_seed
+from replay import KeyedStream
+
+
+#Wilson score interval for `wins` out of `n`.
+def wilson_interval(wins, n, confidence=0.95):
+    if n == 0:
+        return 0.0, 1.0
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    p = wins / n
+    center = (p + z * z / (2 * n)) / (1 + z * z / n)
+    half = z * math.sqrt(p * (1 - p) / n + z * z / (4 * n * n)) / (1 + z * z / n)
+    return max(0.0, center - half), min(1.0, center + half)
+
+
+#Wald's SPRT of "win rate is 0.5 + margin" against "0.5 - margin".
+#Returns "above", "below" or None (keep going).
+def sprt_decision(wins, n, margin=0.02, alpha=0.01, beta=0.01):
+    high, low = 0.5 + margin, 0.5 - margin
+    llr = wins * math.log(high / low) + (n - wins) * math.log((1 - high) / (1 - low))
+    if llr >= math.log((1 - beta) / alpha):
+        return "above"
+    if llr <= math.log(beta / (1 - alpha)):
+        return "below"
+    return None
+
+
+class AdaptiveResult:
+    def __init__(self, wins, duels, low, high, decision, rounds, seconds):
+        self.wins = wins
+        self.duels = duels
+        self.low = low
+        self.high = high
+        self.decision = decision
+        self.rounds = rounds
+        self.seconds = seconds
+
+    def win_rate(self):
+        return self.wins / self.duels if self.duels else 0.0
+
+    def __repr__(self):
+        return (f"AdaptiveResult({self.win_rate():.4f} in [{self.low:.4f}, {self.high:.4f}], "
+                f"{self.duels:,} duels, decision={self.decision})")
+
+
+def adaptive_duel(hero, villain, width=0.01, confidence=0.95, mode="width", margin=0.02,
+                  seed=0, first_batch=256, max_batch=1 << 20, max_duels=50_000_000):
+    if mode not in ("width", "decide"):
+        raise ValueError(f"mode must be 'width' or 'decide', not {mode!r}")
+    stream = KeyedStream(seed)
+    z = NormalDist().inv_cdf(0.5 + confidence / 2)
+    start = time.perf_counter()
+    wins = duels = 0
+    rounds = 0.0
+    batch = first_batch
+    decision = None
+    while duels < max_duels:
+        count = min(batch, max_duels - duels)
+        result = simulate_duels(hero, villain, count, rng=stream, first_fight=duels)
+        wins += int(result.hero_wins.sum())
+        rounds += float(result.rounds.sum())
+        duels += count
+        low, high = wilson_interval(wins, duels, confidence)
+        if mode == "decide":
+            decision = sprt_decision(wins, duels, margin, alpha=(1 - confidence) / 2, beta=(1 - confidence) / 2)
+            if decision is not None:
+                break
+        if high - low <= width:
+            break
+        #Aim the next batch at the sample size the current estimate says is needed,
+        #but never more than double what's been run so far.
+        p = min(max(wins / duels, 1 / duels), 1 - 1 / duels)
+        needed = p * (1 - p) * (2 * z / width) ** 2
+        batch = int(min(max(needed - duels, first_batch), 2 * duels, max_batch))
+    low, high = wilson_interval(wins, duels, confidence)
+    return AdaptiveResult(wins, duels, low, high, decision, rounds / duels, time.perf_counter() - start)
+
+
+def _run_cell(job):
+    hero, villain, seq, options = job
+    seed = int(seq.generate_state(1, np.uint64)[0])
+    return adaptive_duel(hero, villain, seed=seed, **options)
+
+
+#Like matchup_matrix.run_matrix, but every cell stops on its own. Also returns the
+#AdaptiveResult for every cell (intervals and decisions).
+def adaptive_matrix(heroes, villains, seed=0, workers=None, **options):
+    hero_names = list(heroes)
+    villain_names = list(villains)
+    jobs = [(heroes[h], villains[v], cell_seed(seed, h, v), options) for h in hero_names for v in villain_names]
+    start = time.perf_counter()
+    if workers == 1:
+        cells = [_run_cell(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            cells = list(pool.map(_run_cell, jobs))
+    wall = time.perf_counter() - start
+
+    shape = (len(hero_names), len(villain_names))
+    matrix = MatchupMatrix(
+        hero_names,
+        villain_names,
+        np.array([c.win_rate() for c in cells]).reshape(shape),
+        np.array([c.rounds for c in cells]).reshape(shape),
+        np.array([c.seconds for c in cells]).reshape(shape),
+        np.array([c.duels for c in cells]).reshape(shape),
+        wall,
+    )
+    return matrix, np.array(cells, dtype=object).reshape(shape)
+
+
+if __name__ == "__main__":
+    from combatants import party, bestiary
+    parser = argparse.ArgumentParser(description="Party vs bestiary win rates with early stopping")
+    parser.add_argument("--width", type=float, default=0.01, help="widest confidence interval allowed")
+    parser.add_argument("--confidence", type=float, default=0.95)
+    parser.add_argument("--mode", choices=("width", "decide"), default="width")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    args = parser.parse_args()
+
+    matrix, cells = adaptive_matrix(party, bestiary, seed=args.seed, workers=args.workers,
+                                    width=args.width, confidence=args.confidence, mode=args.mode)
+    print(matrix)
+    print()
+    print("Duels per cell:")
+    for i, hero in enumerate(matrix.heroes):
+        print(f"{hero:>11} " + " ".join(f"{d:>10,}" for d in matrix.duels[i]))
+    print(f"{matrix.duels.sum():,} duels in {matrix.wall_seconds:.2f}s "
+          f"({matrix.throughput():,.0f} duels/s)")
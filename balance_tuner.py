@@ -0,0 +1,187 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - balance tuner
+
+#Instead of typing new damage numbers in by hand (SC1) and rerunning, give the tuner a target like
+#"the Goblin should beat the average party member 10% of the time" and it searches HP, AC, AtkMod
+#and damage dice for a stat line that hits it.
+#
+#The search is a local search that starts from the enemy's current stats and tries one change at a
+#time. Every candidate fights the same duels (replay.KeyedStream with the same seed and fight numbers),
+#so the difference between two candidates is the stat change and not luck. Candidates are first
+#scored on a small batch. The ones that clearly can't beat the best so far are dropped before the
+#big batch. Each enemy is tuned in its own process. The final stat line is checked with the exact
+#solver.
+
+import argparse
+import json
+import math
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import dice
+from combatants import character
+from duel_engine import simulate_duels
+from duel_solver import solve_duel
+from replay import KeyedStream
+
+#Damage dice the tuner can pick from, ordered by average damage.
+DICE_LADDER = sorted(
+    {str(dice.compile(f"{count}d{sides}+{bonus}"))
+     for count, sides in ((1, 4), (1, 6), (1, 8), (1, 10), (1, 12), (2, 6), (2, 8), (2, 10), (3, 8), (3, 10))
+     for bonus in range(0, 9)},
+    key=lambda expr: (dice.compile(expr).mean(), expr),
+)
+
+AC_RANGE = (5, 30)
+ATKMOD_RANGE = (-5, 15)
+
+
+def _ladder_index(expr):
+    expr = str(dice.compile(expr))
+    if expr in DICE_LADDER:
+        return DICE_LADDER.index(expr)
+    mean = dice.compile(expr).mean()
+    return min(range(len(DICE_LADDER)), key=lambda i: abs(dice.compile(DICE_LADDER[i]).mean() - mean))
+
+
+#Chance the enemy beats a party member, averaged over the party, from n duels against each.
+#Returns (rate, standard error).
+def enemy_win_rate(enemy, party, n, seed):
+    rates = []
+    for i, hero in enumerate(party):
+        result = simulate_duels(hero, enemy, n, rng=KeyedStream(seed + i))
+        rates.append(float(result.villain_wins.mean()))
+    rate = sum(rates) / len(rates)
+    se = math.sqrt(sum(r * (1 - r) for r in rates) / n) / len(rates)
+    return rate, se
+
+
+def _neighbours(stats, hp_step):
+    hp, init, ac, atkmod, die = stats
+    out = []
+    for dhp in (-hp_step, hp_step):
+        if hp + dhp >= 1:
+            out.append((hp + dhp, init, ac, atkmod, die))
+    for dac in (-1, 1):
+        if AC_RANGE[0] <= ac + dac <= AC_RANGE[1]:
+            out.append((hp, init, ac + dac, atkmod, die))
+    for datk in (-1, 1):
+        if ATKMOD_RANGE[0] <= atkmod + datk <= ATKMOD_RANGE[1]:
+            out.append((hp, init, ac, atkmod + datk, die))
+    for ddie in (-1, 1):
+        if 0 <= die + ddie < len(DICE_LADDER):
+            out.append((hp, init, ac, atkmod, die + ddie))
+    return out
+
+
+def _character(stats):
+    hp, init, ac, atkmod, die = stats
+    return character(hp, init, ac, atkmod, DICE_LADDER[die])
+
+
+class TuneResult:
+    def __init__(self, name, before, after, target, simulated, exact, evaluations, seconds):
+        self.name = name
+        self.before = before
+        self.after = after
+        self.target = target
+        self.simulated = simulated
+        self.exact = exact
+        self.evaluations = evaluations
+        self.seconds = seconds
+
+
+#Tunes one enemy so it beats the average party member `target` of the time.
+def tune_enemy(name, enemy, party, target, seed=0, duels=4000, tolerance=0.005, max_steps=200):
+    start = time.perf_counter()
+    party = list(party)
+    current = (enemy.HP, enemy.init, enemy.ac, enemy.atkmod, _ladder_index(enemy.damage))
+    scores = {}
+    evaluations = 0
+
+    #Error of a candidate on n duels per party member (cached, the same seed means the same duels).
+    def score(stats, n):
+        nonlocal evaluations
+        key = (stats, n)
+        if key not in scores:
+            evaluations += 1
+            rate, se = enemy_win_rate(_character(stats), party, n, seed)
+            scores[key] = (abs(rate - target), se, rate)
+        return scores[key]
+
+    hp_step = max(1, enemy.HP // 4)
+    for _ in range(max_steps):
+        err, _, _ = score(current, duels)
+        if err <= tolerance and hp_step == 1:
+            break
+        candidates = [current] + _neighbours(current, hp_step)
+        #Small batch first, then drop anyone whose error is clearly worse than the best one.
+        n = max(250, duels // 16)
+        while True:
+            results = {c: score(c, n) for c in candidates}
+            best_err, best_se, _ = min(results.values())
+            candidates = [c for c, (e, se, _) in results.items() if e - 2 * se <= best_err + 2 * best_se]
+            if n >= duels or len(candidates) == 1:
+                break
+            n = min(duels, n * 4)
+        best = min(candidates, key=lambda c: score(c, duels)[0])
+        if best == current or score(best, duels)[0] >= score(current, duels)[0]:
+            if hp_step == 1:
+                break
+            hp_step = max(1, hp_step // 2)
+        else:
+            current = best
+
+    tuned = _character(current)
+    simulated = score(current, duels)[2]
+    exact = sum(solve_duel(hero, tuned).villain_win for hero in party) / len(party)
+    return TuneResult(name, enemy, tuned, target, simulated, exact, evaluations, time.perf_counter() - start)
+
+
+def _tune_job(job):
+    return tune_enemy(*job[:4], **job[4])
+
+
+#targets is {enemy name: wanted win rate}. Returns a TuneResult per enemy, tuned in parallel.
+def tune_bestiary(bestiary, party, targets, seed=0, workers=None, **options):
+    jobs = [(name, bestiary[name], list(party), target, dict(options, seed=seed)) for name, target in targets.items()]
+    if workers == 1 or len(jobs) == 1:
+        return [_tune_job(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+        return list(pool.map(_tune_job, jobs))
+
+
+def stat_table(results):
+    return {
+        r.name: {"HP": r.after.HP, "Init": r.after.init, "AC": r.after.ac, "AtkMod": r.after.atkmod,
+                 "Damage": r.after.damage}
+        for r in results
+    }
+
+
+if __name__ == "__main__":
+    from combatants import party, bestiary
+    parser = argparse.ArgumentParser(description="Tune enemy stats to hit target win rates")
+    parser.add_argument("targets", nargs="*", default=["Goblin=0.10", "Orc=0.25", "Troll=0.6"],
+                        help="NAME=RATE, the chance that enemy beats the average party member")
+    parser.add_argument("--duels", type=int, default=4000, help="duels per party member per candidate")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--out", help="write the tuned stat table to this JSON file")
+    args = parser.parse_args()
+
+    targets = {name: float(rate) for name, rate in (t.split("=") for t in args.targets)}
+    start = time.perf_counter()
+    results = tune_bestiary(bestiary, party.values(), targets, seed=args.seed, workers=args.workers,
+                            duels=args.duels)
+    for r in results:
+        print(f"{r.name:<10} target {r.target:6.2%}  simulated {r.simulated:6.2%}  exact {r.exact:6.2%}  "
+              f"({r.evaluations} candidates, {r.seconds:.1f}s)")
+        print(f"{'':<10} before {r.before}")
+        print(f"{'':<10} after  {r.after}")
+    print(f"Done in {time.perf_counter() - start:.1f}s")
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(stat_table(results), f, indent=4)
@@ -0,0 +1,163 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Bean bag
+
+#A bag to pull things out of at random, without putting them back, for HW18's bean bag.
+#random.choice + list.remove is O(n) per pull because remove shifts the whole list. This keeps
+#every item's weight (1 for "every bean is as likely as any other", or anything else for weighted
+#pulls) in a Fenwick tree, where "change one weight" and "find the item where a running total
+#crosses x" are both O(log n). A pull picks a random point in the total weight, finds the item
+#there, and sets its weight to 0. Pulled slots get reused by put(), so the bag doesn't keep growing
+#when it's refilled. Only the random module is needed.
+
+import random
+import time
+
+
+class BeanBag:
+    def __init__(self, items=(), weights=None, rng=random):
+        self.rng = rng
+        items = list(items)
+        weights = [1] * len(items) if weights is None else list(weights)
+        if len(weights) != len(items):
+            raise ValueError("need one weight per item")
+        if any(w < 0 for w in weights):
+            raise ValueError("weights can't be negative")
+        self._items = items
+        self._weights = weights
+        self._free = [i for i, w in enumerate(weights) if w == 0]
+        self._count = len(items) - len(self._free)
+        #Fenwick tree (1-based): _tree[i] is the total weight of slots (i - lowbit(i), i].
+        #Built in O(n) by pushing each node's total up to its parent once.
+        self._tree = [0] + weights
+        for i in range(1, len(self._tree)):
+            parent = i + (i & -i)
+            if parent < len(self._tree):
+                self._tree[parent] += self._tree[i]
+
+    def __len__(self):
+        return self._count
+
+    def __bool__(self):
+        return self._count > 0
+
+    def _change(self, slot, delta):
+        tree = self._tree
+        size = len(tree)
+        i = slot + 1
+        while i < size:
+            tree[i] += delta
+            i += i & -i
+
+    #Total weight of slots before `slot`.
+    def _prefix(self, slot):
+        total = 0
+        i = slot
+        while i > 0:
+            total += self._tree[i]
+            i -= i & -i
+        return total
+
+    @property
+    def total(self):
+        return self._prefix(len(self._weights))
+
+    #Slot where the running total of weights passes `point`.
+    def _find(self, point):
+        tree = self._tree
+        size = len(tree)
+        slot = 0
+        step = 1 << (size - 1).bit_length()
+        while step:
+            nxt = slot + step
+            if nxt < size and tree[nxt] <= point:
+                slot = nxt
+                point -= tree[nxt]
+            step >>= 1
+        return slot
+
+    def draw(self):
+        if not self._count:
+            raise IndexError("draw from an empty bag")
+        while True:
+            total = self.total
+            point = self.rng.randrange(total) if isinstance(total, int) else self.rng.random() * total
+            slot = self._find(point)
+            #Only float rounding can land past the end or on an empty slot, just pick again.
+            if slot < len(self._weights) and self._weights[slot] > 0:
+                break
+        self._change(slot, -self._weights[slot])
+        self._weights[slot] = 0
+        self._free.append(slot)
+        self._count -= 1
+        return self._items[slot]
+
+    #Up to k items (fewer if the bag runs out).
+    def draw_many(self, k):
+        return [self.draw() for _ in range(min(k, self._count))]
+
+    #Puts one item in with the given weight, reusing an emptied slot when there is one.
+    def put(self, item, weight=1):
+        if weight < 0:
+            raise ValueError("weights can't be negative")
+        if weight == 0:
+            return
+        if self._free:
+            slot = self._free.pop()
+            self._items[slot] = item
+            self._weights[slot] = weight
+            self._change(slot, weight)
+        else:
+            self._items.append(item)
+            self._weights.append(weight)
+            #A new last node covers (i - lowbit(i), i]: its own weight plus the nodes below it.
+            i = len(self._weights)
+            node = weight
+            child = i - 1
+            while child > i - (i & -i):
+                node += self._tree[child]
+                child -= child & -child
+            self._tree.append(node)
+        self._count += 1
+
+    def refill(self, items, weights=None):
+        items = list(items)
+        for item, weight in zip(items, [1] * len(items) if weights is None else weights):
+            self.put(item, weight)
+
+    #What's still in the bag (in no particular order).
+    def contents(self):
+        return [item for item, weight in zip(self._items, self._weights) if weight > 0]
+
+
+if __name__ == "__main__":
+    n = 1_000_000
+    start = time.perf_counter()
+    bag = BeanBag(range(n), rng=random.Random(0))
+    print(f"Filled a bag with {n:,} beans in {time.perf_counter() - start:.2f}s")
+    start = time.perf_counter()
+    pulled = bag.draw_many(n)
+    print(f"Pulled all of them in {time.perf_counter() - start:.2f}s, every bean once: {sorted(pulled) == list(range(n))}")
+    start = time.perf_counter()
+    bag.refill(range(n))
+    print(f"Refilled in {time.perf_counter() - start:.2f}s")
+
+    small = 50_000
+    beans = list(range(small))
+    rng = random.Random(0)
+    start = time.perf_counter()
+    while beans:
+        beans.remove(rng.choice(beans))
+    list_time = time.perf_counter() - start
+    bag = BeanBag(range(small), rng=rng)
+    start = time.perf_counter()
+    bag.draw_many(small)
+    print(f"Pulling {small:,} beans: HW18 style (choice + remove) {list_time:.2f}s, BeanBag {time.perf_counter() - start:.2f}s")
+
+    #Weighted: a Gold bean 10x as likely as each of the others.
+    counts = {}
+    for trial in range(20_000):
+        weighted = BeanBag(["Gold", "Red", "Blue", "Green"], [10, 1, 1, 1], rng=rng)
+        first = weighted.draw()
+        counts[first] = counts.get(first, 0) + 1
+    print("First pull out of Gold:10, Red/Blue/Green:1 ->", {k: f"{v / 20_000:.3f}" for k, v in sorted(counts.items())})
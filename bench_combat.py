@@ -0,0 +1,246 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - benchmarks
+
+#Times the combat code so a change that makes it slower gets noticed.
+#   duel_loop      SC6's one-duel-at-a-time while loop (minus the prints), duels/s
+#   vectorized     duel_engine.simulate_duels, duels/s
+#   multiprocess   simulate_duels split over a process pool, duels/s
+#   attack_loop    one Semester Project attack at a time (initiative.attack), attacks/s
+#   attack_batch   the same rule over numpy arrays (duel_engine._attack), attacks/s
+#   log_write      combat_log.EventSink.write, one record at a time, events/s
+#   log_array      combat_log.EventSink.write_array, events/s
+#Every case runs once to warm up, then --repeats times (5 by default), and keeps the best time,
+#since slow runs are usually the machine doing something else. Results are saved as JSON next to
+#this file. With --baseline they get compared against an older results file, and anything more
+#than --threshold (15% by default, 30% with --quick, whose runs are short enough that a busy moment
+#shows up a lot more) slower gets measured again, up to RECHECKS more times, keeping its best. It's
+#only flagged (exit code 1) if it's still slower after that, because on a shared machine one whole
+#run can easily come out 20-40% slow by itself.
+#
+#   python bench_combat.py --save-baseline        first time, or after a change that's meant to be slower
+#   python bench_combat.py --baseline             every time after that
+
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import dice
+from combatants import party, bestiary
+from duel_engine import (HERO_ATTACK, HERO_DAMAGE, VILLAIN_ATTACK, VILLAIN_DAMAGE, _GeneratorStream, _Side,
+                         _attack, simulate_duels)
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+BASELINE = os.path.join(HERE, "bench_baseline.json")
+RESULTS = os.path.join(HERE, "bench_results.json")
+REPEATS = 5
+#How much slower than the baseline counts as slower, for full and --quick runs.
+THRESHOLD = 0.15
+QUICK_THRESHOLD = 0.30
+#Extra runs for a benchmark that looks slower than the baseline before it gets flagged.
+RECHECKS = 2
+HERO = "Astarion"
+VILLAIN = "Orc"
+
+
+#The SC6 duel loop without the print() calls, same rules as duel_engine.
+def _sc6_duel(hero, villain, rng):
+    hero_hp, villain_hp = hero.HP, villain.HP
+    hero_damage, villain_damage = dice.compile(hero.damage), dice.compile(villain.damage)
+    hero_first = rng.randint(1, 20) + hero.init >= rng.randint(1, 20) + villain.init
+    while True:
+        for attacking in ((True, False) if hero_first else (False, True)):
+            attacker, defender = (hero, villain) if attacking else (villain, hero)
+            roll = rng.randint(1, 20)
+            if roll == 20:
+                damage = 2 * (hero_damage if attacking else villain_damage).roll(rng)
+            elif roll == 1 or roll + attacker.atkmod < defender.ac:
+                damage = 0
+            else:
+                damage = (hero_damage if attacking else villain_damage).roll(rng)
+            if attacking:
+                villain_hp -= damage
+                if villain_hp <= 0:
+                    return True
+            else:
+                hero_hp -= damage
+                if hero_hp <= 0:
+                    return False
+
+
+#Best time out of `repeats` calls of fn(), after one untimed call so caches and allocations are
+#already warmed up.
+def _best(fn, repeats):
+    fn()
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_duel_loop(size, repeats=REPEATS):
+    hero, villain = party[HERO], bestiary[VILLAIN]
+    rng = random.Random(0)
+    return size / _best(lambda: [_sc6_duel(hero, villain, rng) for _ in range(size)], repeats)
+
+
+def bench_vectorized(size, repeats=REPEATS):
+    hero, villain = party[HERO], bestiary[VILLAIN]
+    return size / _best(lambda: simulate_duels(hero, villain, size, rng=0), repeats)
+
+
+def _chunk(seed, size):
+    return int(simulate_duels(party[HERO], bestiary[VILLAIN], size, rng=seed).hero_wins.sum())
+
+
+def bench_multiprocess(size, repeats=REPEATS, workers=None):
+    workers = workers or os.cpu_count()
+    chunk = -(-size // workers)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        #Warm-up so process start-up and imports aren't timed.
+        list(pool.map(_chunk, range(workers), [1] * workers))
+        return chunk * workers / _best(lambda: list(pool.map(_chunk, range(workers), [chunk] * workers)), repeats)
+
+
+def bench_attack_loop(size, repeats=REPEATS):
+    from initiative import Fighter, attack
+    hero = Fighter(HERO, 0, party[HERO])
+    villain = Fighter(VILLAIN, 1, bestiary[VILLAIN])
+    rng = random.Random(0)
+    return size / _best(lambda: [attack(hero, villain, rng) for _ in range(size)], repeats)
+
+
+def bench_attack_batch(size, repeats=REPEATS):
+    idx = np.arange(size)
+    stream = _GeneratorStream(0)
+
+    def run():
+        hero = _Side([party[HERO]], [size], 0, HERO_ATTACK, HERO_DAMAGE)
+        villain = _Side([bestiary[VILLAIN]], [size], 1, VILLAIN_ATTACK, VILLAIN_DAMAGE)
+        _attack(hero, villain, idx, stream, 1)
+    return size / _best(run, repeats)
+
+
+def bench_log_write(size, repeats=REPEATS):
+    from combat_log import EventSink, HIT
+    with tempfile.TemporaryDirectory() as folder:
+        def run():
+            with EventSink(os.path.join(folder, "write.clog")) as sink:
+                for i in range(size):
+                    sink.write(i, 1, 0, 15, HIT, 7, 3)
+        return size / _best(run, repeats)
+
+
+def bench_log_array(size, repeats=REPEATS):
+    from combat_log import EVENT_DTYPE, EventSink
+    events = np.zeros(size, dtype=EVENT_DTYPE)
+    events["fight"] = np.arange(size)
+    with tempfile.TemporaryDirectory() as folder:
+        def run():
+            with EventSink(os.path.join(folder, "array.clog")) as sink:
+                for start in range(0, size, 1 << 16):
+                    sink.write_array(events[start:start + (1 << 16)])
+        return size / _best(run, repeats)
+
+
+#name: (function, unit, normal size, --quick size)
+BENCHMARKS = {
+    "duel_loop": (bench_duel_loop, "duels/s", 50_000, 20_000),
+    "vectorized": (bench_vectorized, "duels/s", 1_000_000, 100_000),
+    "multiprocess": (bench_multiprocess, "duels/s", 8_000_000, 800_000),
+    "attack_loop": (bench_attack_loop, "attacks/s", 200_000, 20_000),
+    "attack_batch": (bench_attack_batch, "attacks/s", 1_000_000, 100_000),
+    "log_write": (bench_log_write, "events/s", 500_000, 50_000),
+    "log_array": (bench_log_array, "events/s", 5_000_000, 500_000),
+}
+
+
+def run_one(name, quick=False, repeats=REPEATS):
+    fn, unit, size, quick_size = BENCHMARKS[name]
+    return {"value": fn(quick_size if quick else size, repeats), "unit": unit}
+
+
+def run_benchmarks(names=None, quick=False, repeats=REPEATS):
+    results = {name: run_one(name, quick, repeats) for name in names or BENCHMARKS}
+    return {
+        "time": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "quick": quick,
+        "repeats": repeats,
+        "results": results,
+    }
+
+
+#[(name, old, new, ratio, slower?)] for every benchmark in both runs. Bigger is better for all of them.
+def compare(baseline, current, threshold=THRESHOLD):
+    rows = []
+    for name, result in current["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        ratio = result["value"] / old["value"]
+        rows.append((name, old["value"], result["value"], ratio, ratio < 1 - threshold))
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark the combat simulation hot path")
+    parser.add_argument("names", nargs="*", help="which benchmarks (default all): " + ", ".join(BENCHMARKS))
+    parser.add_argument("--quick", action="store_true", help="smaller sizes, for a fast check")
+    parser.add_argument("--out", default=RESULTS, help="where to save this run's results")
+    parser.add_argument("--baseline", nargs="?", const=BASELINE, help="compare against this results file")
+    parser.add_argument("--save-baseline", action="store_true", help="also save this run as the baseline")
+    parser.add_argument("--threshold", type=float, help="flag anything this much slower (default 0.15 = 15%%, 0.30 with --quick)")
+    parser.add_argument("--repeats", type=int, default=REPEATS, help="runs per benchmark, the best one counts")
+    args = parser.parse_args()
+    if args.threshold is None:
+        args.threshold = QUICK_THRESHOLD if args.quick else THRESHOLD
+    unknown = [name for name in args.names if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark {unknown[0]!r}")
+
+    run = run_benchmarks(args.names, args.quick, args.repeats)
+    for name, result in run["results"].items():
+        print(f"{name:<14}{result['value']:>16,.0f} {result['unit']}")
+    with open(args.out, "w") as f:
+        json.dump(run, f, indent=2)
+    if args.save_baseline:
+        with open(BASELINE, "w") as f:
+            json.dump(run, f, indent=2)
+        print(f"Saved as the baseline ({BASELINE})")
+
+    if args.baseline:
+        if not os.path.exists(args.baseline):
+            sys.exit(f"No baseline at {args.baseline}, make one with --save-baseline")
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if baseline.get("quick") != run["quick"]:
+            print("Warning: the baseline and this run used different sizes (--quick)")
+        rows = compare(baseline, run, args.threshold)
+        for _ in range(RECHECKS):
+            slow = [row[0] for row in rows if row[-1]]
+            if not slow:
+                break
+            print(f"Measuring again: {', '.join(slow)}")
+            for name in slow:
+                again = run_one(name, run["quick"], args.repeats)
+                run["results"][name]["value"] = max(run["results"][name]["value"], again["value"])
+            rows = compare(baseline, run, args.threshold)
+        print(f"\nAgainst {args.baseline} ({baseline['time']}):")
+        for name, old, new, ratio, slower in rows:
+            print(f"{name:<14}{old:>16,.0f} -> {new:>16,.0f}  {ratio - 1:+7.1%}" + ("  SLOWER" if slower else ""))
+        if any(row[-1] for row in rows):
+            sys.exit(1)
@@ -0,0 +1,112 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Import time check
+
+#Checks that importing the reusable assignment modules only defines things: no printing, no
+#input(), no dice rolled, and no numpy pulled in. Each module is imported in a fresh Python
+#process (so nothing is cached from the last one) a few times, keeping the fastest. The time is
+#compared with running just the module's def/class/import lines, which is what an import
+#should cost.
+#
+#   python bench_imports.py            exit code 1 if any module prints, asks for input or is slow
+
+import argparse
+import ast
+import json
+import os
+import tempfile
+import subprocess
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+#Modules other files import from: SC5 -> SC4, HW19 -> HW16, HW7 -> HW6, H8 -> H7_Review, and the
+#combat code's shared pieces.
+MODULES = ["SC4", "SC5", "HW16", "HW6", "H7_Review", "SC6", "combatants", "dice", "running_stats", "bean_bag", "factorial"]
+
+#Run in the child: time the import, then report what it printed and whether numpy got loaded.
+_IMPORT = """
+import io, json, sys, time
+real = sys.stdout
+sys.stdout = captured = io.StringIO()
+start = time.perf_counter()
+import {module}
+elapsed = time.perf_counter() - start
+sys.stdout = real
+print(json.dumps({{"seconds": elapsed, "printed": captured.getvalue(), "numpy": "numpy" in sys.modules}}))
+"""
+
+#Same, but only running the top-level imports, defs and classes (plus plain constant assignments).
+#Compiling happens before the timer starts, since a real import reads the cached .pyc instead.
+_DEFINE = """
+import json, sys, time
+code = compile(open({path!r}).read(), {path!r}, "exec", dont_inherit=True)
+start = time.perf_counter()
+exec(code, {{"__name__": "_defs"}})
+print(json.dumps({{"seconds": time.perf_counter() - start}}))
+"""
+
+
+#The module's source with everything except imports, defs, classes and simple assignments removed.
+def definitions_only(path):
+    with open(path) as f:
+        tree = ast.parse(f.read())
+    keep = (ast.Import, ast.ImportFrom, ast.FunctionDef, ast.ClassDef)
+    tree.body = [node for node in tree.body if isinstance(node, keep) or
+                 isinstance(node, ast.Assign) and not any(isinstance(n, ast.Call) for n in ast.walk(node.value))]
+    return ast.unparse(tree)
+
+
+def _child(code):
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=HERE,
+                            stdin=subprocess.DEVNULL, timeout=60)
+    if result.returncode != 0:
+        return {"error": result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed"}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def measure(module, repeats=5):
+    runs = [_child(_IMPORT.format(module=module)) for _ in range(repeats)]
+    if "error" in runs[0]:
+        return {"module": module, "error": runs[0]["error"]}
+    with tempfile.NamedTemporaryFile("w", suffix=".py", delete=False) as f:
+        f.write(definitions_only(os.path.join(HERE, module + ".py")))
+    try:
+        defines = [_child(_DEFINE.format(path=f.name)) for _ in range(repeats)]
+    finally:
+        os.remove(f.name)
+    return {
+        "module": module,
+        "import": min(run["seconds"] for run in runs),
+        "define": min(run.get("seconds", float("inf")) for run in defines),
+        "printed": runs[0]["printed"],
+        "numpy": runs[0]["numpy"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check that importing modules has no side effects")
+    parser.add_argument("modules", nargs="*", default=MODULES)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--slack", type=float, default=0.005,
+                        help="seconds an import may take beyond its definitions")
+    args = parser.parse_args()
+
+    failed = False
+    print(f"{'module':<14}{'import':>10}{'defs only':>11}  notes")
+    for module in args.modules:
+        result = measure(module, args.repeats)
+        if "error" in result:
+            print(f"{module:<14}{'':>21}  FAILS TO IMPORT: {result['error']}")
+            failed = True
+            continue
+        notes = []
+        if result["printed"]:
+            notes.append(f"prints {len(result['printed'].splitlines())} lines")
+        if result["numpy"]:
+            notes.append("loads numpy")
+        if result["import"] > result["define"] + args.slack:
+            notes.append("slower than its definitions")
+        failed = failed or bool(notes)
+        print(f"{module:<14}{result['import'] * 1e3:>8.2f}ms{result['define'] * 1e3:>9.2f}ms  {', '.join(notes) or 'ok'}")
+    sys.exit(1 if failed else 0)
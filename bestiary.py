@@ -0,0 +1,227 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - bestiary loader
+
+#Loads creatures from a CSV or JSON file instead of hard coding them like partyDict/enemyDict.
+#The first time a file is opened it gets compiled into a folder next to it (<file>.cols) with one
+#numpy array per stat, a table of the distinct damage dice, and the names packed into one blob.
+#After that, opening the bestiary just memory maps those arrays, so a tool starts instantly and
+#only the pages for the creatures it actually looks at get read. Looking a name up is a binary
+#search over a sorted index, so it touches about log2(n) names.
+#
+#CSV columns (same names as the Semester Project dictionaries): Name, HP, Init, AC, AtkMod, Damage
+#JSON: either a list of objects with those keys, or {"Goblin": {"HP": 7, ...}, ...}
+
+import csv
+import json
+import os
+import shutil
+import time
+
+import numpy as np
+
+import dice
+from combatants import character
+
+FORMAT_VERSION = 1
+STATS = ("HP", "Init", "AC", "AtkMod")
+_COLUMN_FILES = {"HP": "hp.npy", "Init": "init.npy", "AC": "ac.npy", "AtkMod": "atkmod.npy"}
+
+
+def _read_source(path):
+    if path.lower().endswith(".json"):
+        with open(path) as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [dict(stats, Name=name) for name, stats in data.items()]
+        return data
+    with open(path, newline="") as f:
+        return list(csv.DictReader(f))
+
+
+#Smallest int type that fits the column (int16 for anything normal).
+def _int_column(values):
+    array = np.asarray(values, dtype=np.int64)
+    for kind in (np.int16, np.int32):
+        info = np.iinfo(kind)
+        if array.size == 0 or (array.min() >= info.min and array.max() <= info.max):
+            return array.astype(kind)
+    return array
+
+
+def cache_dir(path):
+    return path + ".cols"
+
+
+def compile_bestiary(path):
+    rows = _read_source(path)
+    names = [str(row["Name"]) for row in rows]
+    if len(set(names)) != len(names):
+        raise ValueError(f"{path} has duplicate names")
+
+    folder = cache_dir(path)
+    temp = folder + ".tmp"
+    shutil.rmtree(temp, ignore_errors=True)
+    os.makedirs(temp)
+
+    for stat in STATS:
+        np.save(os.path.join(temp, _COLUMN_FILES[stat]), _int_column([int(row[stat]) for row in rows]))
+
+    dice_list = []
+    dice_index = {}
+    codes = []
+    for row in rows:
+        expr = str(dice.compile(row["Damage"]))
+        if expr not in dice_index:
+            dice_index[expr] = len(dice_list)
+            dice_list.append(expr)
+        codes.append(dice_index[expr])
+    np.save(os.path.join(temp, "dice.npy"), np.asarray(codes, dtype=np.uint16 if len(dice_list) < 1 << 16 else np.uint32))
+
+    encoded = [name.encode() for name in names]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(e) for e in encoded])
+    with open(os.path.join(temp, "names.bin"), "wb") as f:
+        f.write(b"".join(encoded))
+    np.save(os.path.join(temp, "name_offsets.npy"), offsets)
+    order = sorted(range(len(encoded)), key=encoded.__getitem__)
+    np.save(os.path.join(temp, "name_order.npy"), np.asarray(order, dtype=np.int32 if len(order) < 1 << 31 else np.int64))
+
+    source = os.stat(path)
+    with open(os.path.join(temp, "meta.json"), "w") as f:
+        json.dump({"version": FORMAT_VERSION, "count": len(rows), "dice": dice_list,
+                   "source_size": source.st_size, "source_mtime": source.st_mtime_ns}, f)
+    shutil.rmtree(folder, ignore_errors=True)
+    os.replace(temp, folder)
+
+
+def _is_fresh(path):
+    try:
+        with open(os.path.join(cache_dir(path), "meta.json")) as f:
+            meta = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return False
+    source = os.stat(path)
+    return (meta.get("version") == FORMAT_VERSION and meta["source_size"] == source.st_size
+            and meta["source_mtime"] == source.st_mtime_ns)
+
+
+class Bestiary:
+    def __init__(self, path):
+        if not _is_fresh(path):
+            compile_bestiary(path)
+        self.folder = cache_dir(path)
+        with open(os.path.join(self.folder, "meta.json")) as f:
+            meta = json.load(f)
+        self.count = meta["count"]
+        self.dice = meta["dice"]
+        self._arrays = {}
+
+    #Columns are only mapped the first time they're used.
+    def _array(self, filename):
+        if filename not in self._arrays:
+            full = os.path.join(self.folder, filename)
+            if filename.endswith(".bin"):
+                self._arrays[filename] = np.memmap(full, dtype=np.uint8, mode="r") if os.path.getsize(full) else np.zeros(0, np.uint8)
+            else:
+                self._arrays[filename] = np.load(full, mmap_mode="r")
+        return self._arrays[filename]
+
+    def column(self, stat):
+        if stat == "Damage":
+            return self._array("dice.npy")
+        return self._array(_COLUMN_FILES[stat])
+
+    @property
+    def hp(self):
+        return self.column("HP")
+
+    @property
+    def init(self):
+        return self.column("Init")
+
+    @property
+    def ac(self):
+        return self.column("AC")
+
+    @property
+    def atkmod(self):
+        return self.column("AtkMod")
+
+    #damage_codes[i] indexes self.dice.
+    @property
+    def damage_codes(self):
+        return self.column("Damage")
+
+    def __len__(self):
+        return self.count
+
+    def name(self, i):
+        offsets = self._array("name_offsets.npy")
+        return bytes(self._array("names.bin")[offsets[i]:offsets[i + 1]]).decode()
+
+    #Row number of a creature, or -1.
+    def find(self, name):
+        key = name.encode()
+        order = self._array("name_order.npy")
+        offsets = self._array("name_offsets.npy")
+        blob = self._array("names.bin")
+        low, high = 0, self.count
+        while low < high:
+            mid = (low + high) // 2
+            i = order[mid]
+            if bytes(blob[offsets[i]:offsets[i + 1]]) < key:
+                low = mid + 1
+            else:
+                high = mid
+        if low < self.count:
+            i = int(order[low])
+            if bytes(blob[offsets[i]:offsets[i + 1]]) == key:
+                return i
+        return -1
+
+    def __contains__(self, name):
+        return self.find(name) >= 0
+
+    def character(self, i):
+        return character(int(self.hp[i]), int(self.init[i]), int(self.ac[i]), int(self.atkmod[i]),
+                         self.dice[int(self.damage_codes[i])])
+
+    def __getitem__(self, name):
+        i = self.find(name)
+        if i < 0:
+            raise KeyError(name)
+        return self.character(i)
+
+    def get(self, name, default=None):
+        i = self.find(name)
+        return self.character(i) if i >= 0 else default
+
+
+if __name__ == "__main__":
+    import random
+    import subprocess
+    import sys
+    import tempfile
+
+    here = os.path.dirname(os.path.abspath(__file__))
+    beasts = Bestiary(os.path.join(here, "bestiary.csv"))
+    print(f"{len(beasts)} creatures in bestiary.csv, the Dragon is {beasts['Dragon']}")
+
+    #A made up 100k creature bestiary to show the load time.
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "big.csv")
+        rng = random.Random(0)
+        with open(path, "w", newline="") as f:
+            out = csv.writer(f)
+            out.writerow(["Name", "HP", "Init", "AC", "AtkMod", "Damage"])
+            for i in range(100_000):
+                out.writerow([f"Creature {i}", rng.randint(1, 300), rng.randint(-1, 5), rng.randint(8, 22),
+                              rng.randint(0, 12), f"{rng.randint(1, 4)}d{rng.choice((4, 6, 8, 10, 12))}+{rng.randint(0, 8)}"])
+        start = time.perf_counter()
+        Bestiary(path)
+        print(f"Compiling 100,000 creatures: {time.perf_counter() - start:.2f}s (only the first time)")
+        code = ("import time; t = time.perf_counter(); import bestiary; b = bestiary.Bestiary(%r); "
+                "c = b['Creature 77777']; print(f'{(time.perf_counter() - t) * 1000:.1f} ms', c)" % path)
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, cwd=here)
+        print("Fresh process, import + open + one lookup:", result.stdout.strip() or result.stderr)
@@ -0,0 +1,220 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Coin flips in bulk
+
+#HW18's h_or_t() flips one coin per loop with random.randint(1, 2). A coin flip is one random
+#bit, so this takes the bits 64 at a time instead and counts the 1s (heads) with a popcount.
+# - count_heads(n) for a few flips uses random.getrandbits(n).bit_count(), no numpy needed.
+# - flip(n) does any number of flips in fixed-size chunks of raw 64-bit words, optionally spread
+#   over a process pool. Every chunk has its own seed (from the seed and the chunk number), so the
+#   answer is the same no matter how many workers run it.
+# - method="binomial" draws each chunk's head count straight from the binomial distribution, for
+#   when only the totals matter (fastest, same distribution, not the same numbers as "bits").
+# - runs=True also works out streaks: how many runs of heads/tails of each length, and the longest.
+#   That needs every bit unpacked, so it's a lot slower than just counting.
+
+import os
+import random
+import time
+
+CHUNK = 1 << 28
+#Run lengths are worked out this many flips at a time (one byte per flip while it happens).
+RUN_BLOCK = 1 << 22
+#Up to this many flips count_heads just uses the random module, past it flip() takes over.
+SMALL = 1 << 20
+
+
+#Number of heads in n flips. rng is the random module or a random.Random.
+def count_heads(n, rng=random):
+    if n > SMALL:
+        return flip(n, seed=rng.getrandbits(64)).heads
+    return rng.getrandbits(n).bit_count() if n else 0
+
+
+def _popcount(words):
+    import numpy as np
+    if hasattr(np, "bitwise_count"):
+        return int(np.bitwise_count(words).sum(dtype=np.int64))
+    #numpy < 2.0: count bits a byte at a time with a 256 entry table.
+    table = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+    return int(table[words.view(np.uint8)].sum(dtype=np.int64))
+
+
+#Streaks inside one stretch of flips. The first and last run might carry on into the stretch next
+#to it, so they're kept separately until everything is merged: lead and tail are (bit, length),
+#and single means the whole stretch was one run (only lead is used then).
+class RunStats:
+    def __init__(self, lead=None, tail=None, heads_runs=None, tails_runs=None, single=False):
+        import numpy as np
+        self.lead = lead
+        self.tail = tail
+        self.single = single
+        #heads_runs[k] = number of finished runs of exactly k heads (same for tails).
+        self.heads_runs = heads_runs if heads_runs is not None else np.zeros(1, dtype=np.int64)
+        self.tails_runs = tails_runs if tails_runs is not None else np.zeros(1, dtype=np.int64)
+
+    @classmethod
+    def from_bits(cls, bits):
+        import numpy as np
+        change = np.flatnonzero(bits[1:] != bits[:-1]) + 1
+        edges = np.concatenate([[0], change, [bits.size]])
+        lengths = np.diff(edges)
+        values = bits[edges[:-1]]
+        lead = (int(values[0]), int(lengths[0]))
+        if lengths.size == 1:
+            return cls(lead, single=True)
+        inner, inner_values = lengths[1:-1], values[1:-1]
+        return cls(lead, (int(values[-1]), int(lengths[-1])),
+                   np.bincount(inner[inner_values == 1], minlength=1).astype(np.int64),
+                   np.bincount(inner[inner_values == 0], minlength=1).astype(np.int64))
+
+    def _close(self, run):
+        import numpy as np
+        bit, length = run
+        name = "heads_runs" if bit else "tails_runs"
+        counts = getattr(self, name)
+        if length >= counts.size:
+            counts = np.concatenate([counts, np.zeros(length + 1 - counts.size, dtype=np.int64)])
+        counts[length] += 1
+        setattr(self, name, counts)
+
+    #These flips followed by other's flips.
+    def then(self, other):
+        if self.lead is None:
+            return other
+        if other.lead is None:
+            return self
+        merged = RunStats(self.lead, self.tail, _add(self.heads_runs, other.heads_runs),
+                          _add(self.tails_runs, other.tails_runs))
+        end = self.lead if self.single else self.tail
+        start = other.lead
+        if end[0] == start[0]:
+            joined = (end[0], end[1] + start[1])
+            if self.single and other.single:
+                return RunStats(joined, single=True)
+            if self.single:
+                merged.lead, merged.tail = joined, other.tail
+            elif other.single:
+                merged.tail = joined
+            else:
+                merged.tail = other.tail
+                merged._close(joined)
+            return merged
+        if not self.single:
+            merged._close(end)
+        if other.single:
+            merged.tail = start
+        else:
+            merged._close(start)
+            merged.tail = other.tail
+        return merged
+
+    #Counts with the first and last runs included, once nothing else is coming.
+    def finished(self):
+        done = RunStats(heads_runs=self.heads_runs.copy(), tails_runs=self.tails_runs.copy())
+        if self.lead is not None:
+            done._close(self.lead)
+            if not self.single:
+                done._close(self.tail)
+        return done
+
+    def longest(self):
+        done = self.finished()
+        return (int(done.heads_runs.nonzero()[0].max(initial=0)), int(done.tails_runs.nonzero()[0].max(initial=0)))
+
+    def total_runs(self):
+        done = self.finished()
+        return int(done.heads_runs.sum() + done.tails_runs.sum())
+
+
+def _add(a, b):
+    if a.size < b.size:
+        a, b = b, a
+    out = a.copy()
+    out[:b.size] += b
+    return out
+
+
+class FlipResult:
+    def __init__(self, flips, heads, runs=None):
+        self.flips = flips
+        self.heads = heads
+        self.tails = flips - heads
+        self.runs = runs
+
+    def __repr__(self):
+        return f"FlipResult(flips={self.flips}, heads={self.heads}, tails={self.tails})"
+
+
+#Chunk number `index` of a flip() call, `size` flips long. Returns (heads, RunStats or None).
+def _chunk(seed, index, size, method, runs):
+    import numpy as np
+    rng = np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(index,)))
+    if method == "binomial":
+        return int(rng.binomial(size, 0.5)), None
+    words = rng.bit_generator.random_raw((size + 63) // 64)
+    extra = words.size * 64 - size
+    if extra:
+        #Only the low 64 - extra bits of the last word are real flips.
+        words[-1] &= np.uint64((1 << (64 - extra)) - 1)
+    heads = _popcount(words)
+    if not runs:
+        return heads, None
+    streaks = RunStats()
+    for start in range(0, size, RUN_BLOCK):
+        block = words[start // 64:(start + RUN_BLOCK) // 64 + 1]
+        bits = np.unpackbits(block.view(np.uint8), bitorder="little")[:min(RUN_BLOCK, size - start)]
+        streaks = streaks.then(RunStats.from_bits(bits))
+    return heads, streaks
+
+
+#n flips in chunks of `chunk`. workers > 1 uses a process pool.
+def flip(n, seed=0, workers=1, chunk=CHUNK, runs=False, method="bits"):
+    if method not in ("bits", "binomial"):
+        raise ValueError("method is 'bits' or 'binomial'")
+    if runs and method == "binomial":
+        raise ValueError("run lengths need method='bits'")
+    sizes = [min(chunk, n - start) for start in range(0, n, chunk)]
+    args = ([seed] * len(sizes), range(len(sizes)), sizes, [method] * len(sizes), [runs] * len(sizes))
+    if workers > 1 and len(sizes) > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parts = list(pool.map(_chunk, *args))
+    else:
+        parts = list(map(_chunk, *args))
+    streaks = None
+    if runs:
+        streaks = RunStats()
+        for _, part in parts:
+            streaks = streaks.then(part)
+    return FlipResult(n, sum(heads for heads, _ in parts), streaks)
+
+
+if __name__ == "__main__":
+    rng = random.Random(0)
+    start = time.perf_counter()
+    loop_n = 1_000_000
+    heads = sum(rng.randint(1, 2) == 1 for _ in range(loop_n))
+    loop_rate = loop_n / (time.perf_counter() - start)
+    print(f"HW18 style loop: {loop_rate:,.0f} flips/s")
+
+    start = time.perf_counter()
+    small = count_heads(SMALL, rng)
+    print(f"count_heads({SMALL:,}): {small:,} heads, {SMALL / (time.perf_counter() - start):,.0f} flips/s")
+
+    workers = os.cpu_count()
+    for n, method, runs in ((10 ** 10, "bits", False), (10 ** 10, "binomial", False), (10 ** 9, "bits", True)):
+        start = time.perf_counter()
+        result = flip(n, seed=2025, workers=workers, method=method, runs=runs)
+        elapsed = time.perf_counter() - start
+        line = (f"{n:,} flips ({method}{', runs' if runs else ''}) on {workers} workers in {elapsed:.2f}s: "
+                f"{result.heads / n:.6f} heads")
+        if runs:
+            longest = result.runs.longest()
+            line += f", {result.runs.total_runs():,} runs, longest {longest[0]} heads / {longest[1]} tails"
+        print(line)
+
+    #Same answer with one chunk or many, one worker or several.
+    one = flip(10_000_003, seed=7, chunk=1 << 20, runs=True)
+    many = flip(10_000_003, seed=7, chunk=1 << 20, runs=True, workers=4)
+    print("Same result for any worker count:", one.heads == many.heads and one.runs.longest() == many.runs.longest())
@@ -0,0 +1,227 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - combat log
+
+#A binary combat log instead of a print() for every swing. Every attack is one fixed-size record:
+#
+#   fight   uint32  which fight in the batch
+#   round   uint16
+#   actor   uint32  id of the attacker (names are kept next to the log in <log>.names.json)
+#   roll    uint8   the d20
+#   outcome uint8   MISS, HIT, CRIT or FUMBLE (natural 1)
+#   damage  uint16
+#   hp      int32   target's HP after the swing
+#
+#The file is a small header followed by records packed back to back (18 bytes each), written
+#through a big buffer. read_events() streams them back and render() turns them into the
+#"Hero hits!" style text only when someone wants to read it.
+
+import json
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+import dice
+
+MAGIC = b"CLOG"
+VERSION = 1
+MISS, HIT, CRIT, FUMBLE = 0, 1, 2, 3
+OUTCOMES = ("misses", "hits", "crits", "fumbles")
+
+RECORD = struct.Struct("<IHIBBHi")
+EVENT_DTYPE = np.dtype([
+    ("fight", "<u4"),
+    ("round", "<u2"),
+    ("actor", "<u4"),
+    ("roll", "u1"),
+    ("outcome", "u1"),
+    ("damage", "<u2"),
+    ("hp", "<i4"),
+])
+HEADER = struct.Struct("<4sHH")
+
+assert RECORD.size == EVENT_DTYPE.itemsize
+
+
+def _names_path(path):
+    return f"{path}.names.json"
+
+
+#Writes records to `path`. Use it as a context manager (or call close()) so the last buffer and
+#the actor names get written.
+class EventSink:
+    def __init__(self, path, buffer_records=1 << 16):
+        self.path = path
+        self._file = open(path, "wb")
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size))
+        self._buffer = bytearray(RECORD.size * buffer_records)
+        self._used = 0
+        self._names = []
+        self._ids = {}
+        self.count = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    #Stable id for an actor name (the first name seen is 0, then 1, ...).
+    def actor_id(self, name):
+        if name not in self._ids:
+            self._ids[name] = len(self._names)
+            self._names.append(name)
+        return self._ids[name]
+
+    def write(self, fight, round_no, actor, roll, outcome, damage, hp):
+        if self._used == len(self._buffer):
+            self.flush()
+        RECORD.pack_into(self._buffer, self._used, fight, round_no, actor, roll, outcome, damage, hp)
+        self._used += RECORD.size
+        self.count += 1
+
+    #Writes a whole numpy array of EVENT_DTYPE records at once.
+    def write_array(self, events):
+        self.flush()
+        self._file.write(np.ascontiguousarray(events, dtype=EVENT_DTYPE).data)
+        self.count += len(events)
+
+    #on_attack hook for initiative.run_encounter: logs every swing of one encounter.
+    def encounter_hook(self, fight=0):
+        def on_attack(round_no, attacker, defender, roll, damage):
+            if roll == 20:
+                outcome = CRIT
+            elif roll == 1:
+                outcome = FUMBLE
+            elif roll + attacker.stats.atkmod >= defender.stats.ac:
+                outcome = HIT
+            else:
+                outcome = MISS
+            self.write(fight, round_no, self.actor_id(attacker.name), roll, outcome, damage, defender.HP)
+        return on_attack
+
+    def flush(self):
+        if self._used:
+            self._file.write(memoryview(self._buffer)[:self._used])
+            self._used = 0
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.flush()
+        self._file.close()
+        with open(_names_path(self.path), "w") as f:
+            json.dump(self._names, f)
+
+
+def _check_header(f, path):
+    magic, version, size = HEADER.unpack(f.read(HEADER.size))
+    if magic != MAGIC or version != VERSION or size != RECORD.size:
+        raise ValueError(f"{path} is not a version {VERSION} combat log")
+
+
+def read_names(path):
+    try:
+        with open(_names_path(path)) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return []
+
+
+#Streams records back as numpy arrays of up to chunk_records events each.
+def read_chunks(path, chunk_records=1 << 16):
+    with open(path, "rb") as f:
+        _check_header(f, path)
+        while True:
+            data = f.read(RECORD.size * chunk_records)
+            if not data:
+                break
+            yield np.frombuffer(data, dtype=EVENT_DTYPE)
+
+
+#Streams records back one at a time as tuples.
+def read_events(path):
+    for chunk in read_chunks(path):
+        yield from chunk.tolist()
+
+
+#The whole log as a read-only memory-mapped array (nothing is read until it's indexed).
+def load_events(path):
+    return np.memmap(path, dtype=EVENT_DTYPE, mode="r", offset=HEADER.size)
+
+
+#Text version of the log, one line per swing.
+def render(path, names=None):
+    names = names if names is not None else read_names(path)
+    for fight, round_no, actor, roll, outcome, damage, hp in read_events(path):
+        who = names[actor] if actor < len(names) else f"#{actor}"
+        line = f"[fight {fight} round {round_no}] {who} rolls {roll} and {OUTCOMES[outcome]}"
+        if damage:
+            line += f" for {damage}"
+        yield line + f" (target at {hp} HP)"
+
+
+#Old SC6 style duel (one print per swing) used for the throughput comparison below.
+def _print_duel(hero, villain, rng, out):
+    hero_hp, villain_hp = hero.HP, villain.HP
+    hero_turn = rng.randint(1, 20) + hero.init >= rng.randint(1, 20) + villain.init
+    while hero_hp > 0 and villain_hp > 0:
+        attacker, defender = (hero, villain) if hero_turn else (villain, hero)
+        roll = rng.randint(1, 20)
+        damage = 0
+        if roll == 20:
+            print("Critical Hit!", file=out)
+            damage = 2 * dice.compile(attacker.damage).roll(rng)
+        elif roll == 1:
+            print("Critical Miss!", file=out)
+        elif roll + attacker.atkmod >= defender.ac:
+            print("Hit!", file=out)
+            damage = dice.compile(attacker.damage).roll(rng)
+        else:
+            print("Miss!", file=out)
+        if hero_turn:
+            villain_hp -= damage
+            print(f"Villain has {villain_hp} HP", file=out)
+        else:
+            hero_hp -= damage
+            print(f"Hero has {hero_hp} HP", file=out)
+        hero_turn = not hero_turn
+
+
+if __name__ == "__main__":
+    import itertools
+    import random
+    import tempfile
+    from combatants import party, bestiary
+    from duel_engine import simulate_duels
+
+    hero = party["Astarion"]
+    villain = bestiary["Orc"]
+    printed = 20_000
+    #Line buffered like a terminal, but to /dev/null so this doesn't flood the screen.
+    #A real terminal is slower than this, so the speedup below is a lower bound.
+    with open(os.devnull, "w", buffering=1) as out:
+        rng = random.Random(0)
+        start = time.perf_counter()
+        for _ in range(printed):
+            _print_duel(hero, villain, rng, out)
+        print_rate = printed / (time.perf_counter() - start)
+
+    logged = 1_000_000
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "duels.clog")
+        start = time.perf_counter()
+        with EventSink(path) as sink:
+            simulate_duels(hero, villain, logged, rng=0, log=sink)
+        log_rate = logged / (time.perf_counter() - start)
+        size = os.path.getsize(path)
+        for line in itertools.islice(render(path), 6):
+            print(line)
+        print(f"{sink.count:,} events, {size / 1e6:.1f} MB")
+
+    print(f"print() loop:   {print_rate:12,.0f} duels/s")
+    print(f"binary log:     {log_rate:12,.0f} duels/s ({log_rate / print_rate:.0f}x)")
+    sys.exit(0 if log_rate >= 50 * print_rate else 1)
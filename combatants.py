@@ -0,0 +1,46 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - character stats
+
+#The party and the enemies from Semester Project 1 / SC6, as classes, without a fight running on import.
+#The stats live in party.csv and bestiary.csv (Name, HP, Init, AC, AtkMod, Damage). Damage is kept as a
+#dice expression ("1d8+1d6+4") so every hit rolls its own damage instead of one number rolled when the
+#file loads. Goblin uses the Semester Project damage (1d6+2), SC6 had copied the Orc's 1d12+3 by mistake.
+#For big creature lists use bestiary.Bestiary, which doesn't read the whole file into objects.
+
+import csv
+import os
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+class character:
+    #No per-instance __dict__, a character is just these five fields (roster.Roster for millions).
+    __slots__ = ("HP", "init", "atkmod", "damage", "ac")
+
+    def __init__(self,HP,init,ac,atkmod,damage):
+        self.HP = HP
+        self.init = init
+        self.atkmod = atkmod
+        self.damage = damage
+        self.ac = ac
+
+    def __repr__(self):
+        return f"character({self.HP}, {self.init}, {self.ac}, {self.atkmod}, {self.damage!r})"
+
+
+#{name: character} from one of the CSV files next to this one.
+def load_csv(filename):
+    with open(os.path.join(_HERE, filename), newline="") as f:
+        return {
+            row["Name"]: character(int(row["HP"]), int(row["Init"]), int(row["AC"]), int(row["AtkMod"]), row["Damage"])
+            for row in csv.DictReader(f)
+        }
+
+
+#party and bestiary are read the first time something uses them, not when this module is imported.
+def __getattr__(name):
+    if name in ("party", "bestiary"):
+        globals()[name] = load_csv(name + ".csv")
+        return globals()[name]
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,182 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - dice
+
+#A dice expression is a sum of terms like "1d8+1d6+4" or "2d10-1". A plain int is a fixed amount.
+#Dice("1d8+1d6+4") parses the text once. The first time it's used for sampling it works out the exact
+#distribution and a lookup table, after that rolling a million hits is one array lookup.
+#Rolling a single hit (Dice.roll) only uses the random library, so the old scripts don't need numpy.
+
+import random
+import re
+from functools import lru_cache
+
+_TERM = re.compile(r"([+-])?(\d*)d(\d+)|([+-])?(\d+)")
+
+#Up to this many equally likely outcomes, sampling indexes a table with one entry per outcome.
+#Bigger expressions (like 10d20) fall back to a binary search over the cumulative chances.
+TABLE_LIMIT = 1 << 16
+
+
+#Turns "1d8+1d6+4" into ([(1, 8), (1, 6)], 4). Negative dice terms are not allowed.
+def parse(expr):
+    if isinstance(expr, int):
+        return [], expr
+    text = expr.replace(" ", "").lower()
+    dice = []
+    bonus = 0
+    pos = 0
+    while pos < len(text):
+        match = _TERM.match(text, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"bad dice expression: {expr!r}")
+        if pos > 0 and match.group(1) is None and match.group(4) is None:
+            raise ValueError(f"bad dice expression: {expr!r}")
+        if match.group(3) is not None:
+            if match.group(1) == "-":
+                raise ValueError(f"negative dice are not supported: {expr!r}")
+            count = int(match.group(2) or 1)
+            sides = int(match.group(3))
+            if sides < 1:
+                raise ValueError(f"bad dice expression: {expr!r}")
+            dice.append((count, sides))
+        else:
+            value = int(match.group(5))
+            bonus += -value if match.group(4) == "-" else value
+        pos = match.end()
+    if not dice and pos == 0:
+        raise ValueError(f"bad dice expression: {expr!r}")
+    return dice, bonus
+
+
+class Dice:
+    def __init__(self, expr):
+        if isinstance(expr, Dice):
+            dice, self.bonus = expr.dice, expr.bonus
+        else:
+            dice, self.bonus = parse(expr)
+        #Same sides get merged so "1d6+1d6+3" and "2d6+3" are the same Dice.
+        merged = {}
+        for count, sides in dice:
+            merged[sides] = merged.get(sides, 0) + count
+        self.dice = tuple((count, sides) for sides, count in sorted(merged.items(), reverse=True) if count)
+        self.outcomes = 1
+        for count, sides in self.dice:
+            self.outcomes *= sides ** count
+        self._pmf = None
+        self._cdf = None
+        self._table = None
+
+    def __str__(self):
+        parts = [f"{count}d{sides}" for count, sides in self.dice]
+        if self.bonus or not parts:
+            parts.append(str(self.bonus))
+        return "+".join(parts).replace("+-", "-")
+
+    def __repr__(self):
+        return f"Dice({str(self)!r})"
+
+    def __eq__(self, other):
+        return isinstance(other, Dice) and (self.dice, self.bonus) == (other.dice, other.bonus)
+
+    def __hash__(self):
+        return hash((self.dice, self.bonus))
+
+    def min(self):
+        return max(0, sum(count for count, _ in self.dice) + self.bonus)
+
+    def max(self):
+        return max(0, sum(count * sides for count, sides in self.dice) + self.bonus)
+
+    def mean(self):
+        pmf = self.pmf()
+        return float(pmf @ range(len(pmf)))
+
+    #One roll with the random library (or a random.Random), for code that only needs a single hit.
+    def roll(self, rng=random):
+        total = self.bonus
+        for count, sides in self.dice:
+            for _ in range(count):
+                total += rng.randint(1, sides)
+        return max(0, total)
+
+    #Exact distribution: pmf()[k] is the chance of a total of k. Totals below 0 count as 0.
+    def pmf(self):
+        if self._pmf is None:
+            self._pmf = self._counts() / self.outcomes
+            self._pmf.flags.writeable = False
+        return self._pmf
+
+    #Chance of a total of k or less.
+    def cdf(self):
+        if self._cdf is None:
+            import numpy as np
+            self._cdf = np.cumsum(self.pmf())
+            self._cdf[-1] = 1.0
+            self._cdf.flags.writeable = False
+        return self._cdf
+
+    #Number of ways to roll each total, as exact integers when they fit.
+    def _counts(self):
+        import numpy as np
+        exact = self.outcomes < 2 ** 62
+        dist = np.ones(1, dtype=np.int64 if exact else np.float64)
+        for count, sides in self.dice:
+            face = np.ones(sides, dtype=dist.dtype)
+            for _ in range(count):
+                dist = np.convolve(dist, face)
+        low = sum(count for count, _ in self.dice) + self.bonus
+        if low >= 0:
+            return np.concatenate([np.zeros(low, dtype=dist.dtype), dist])
+        if -low >= len(dist):
+            #Every total is below 0, so it's always 0.
+            return np.array([dist.sum()], dtype=dist.dtype)
+        out = dist[-low:].copy()
+        out[0] += dist[:-low].sum()
+        return out
+
+    #Turns uniform numbers in [0, 1) into rolls.
+    def quantile(self, u):
+        import numpy as np
+        if self.outcomes <= TABLE_LIMIT:
+            idx = (np.asarray(u) * self.outcomes).astype(np.int64)
+            return self._lookup()[np.minimum(idx, self.outcomes - 1)]
+        return np.searchsorted(self.cdf(), u, side="right").astype(np.int32)
+
+    #n rolls at once with a numpy Generator, as an int32 array.
+    def sample(self, rng, n):
+        if self.outcomes <= TABLE_LIMIT:
+            return self._lookup()[rng.integers(0, self.outcomes, n)]
+        return self.quantile(rng.random(n))
+
+    #table[i] is the total for the i-th of the equally likely outcomes, in sorted order.
+    def _lookup(self):
+        if self._table is None:
+            import numpy as np
+            counts = self._counts()
+            self._table = np.repeat(np.arange(len(counts), dtype=np.int32), counts)
+            self._table.flags.writeable = False
+        return self._table
+
+
+#Parsed once and cached: compile("2d6+3") hands back the same Dice (and its tables) every time.
+@lru_cache(maxsize=None)
+def _compile(expr):
+    return Dice(expr)
+
+
+def compile(expr):
+    if isinstance(expr, Dice):
+        return expr
+    if isinstance(expr, str):
+        expr = expr.replace(" ", "").lower()
+    return _compile(expr)
+
+
+def pmf(expr):
+    return compile(expr).pmf()
+
+
+#Rolls the expression n times with a numpy Generator and returns an int array (never below 0).
+def roll(expr, rng, n):
+    return compile(expr).sample(rng, n)
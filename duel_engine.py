@@ -0,0 +1,238 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - batch duels
+
+#Fights N duels between two characters at the same time using numpy arrays instead of
+#the one-duel-at-a-time while loop in SC6. Same rules as Semester Project 1:
+# - Both sides roll d20 + Init, the hero goes first on a tie.
+# - Attacks are d20 + AtkMod against the target's AC. A natural 20 always hits for double damage,
+#   a natural 1 always misses.
+# - Every hit rolls its own damage.
+# - One round is both sides attacking once, the fight stops as soon as someone hits 0 HP.
+
+import time
+
+import numpy as np
+
+import dice
+
+#Fights that last longer than this are counted as a draw (neither side wins).
+MAX_ROUNDS = 1000
+
+#Bump this whenever a rule change would make old seeds/replays play out differently.
+RULES_VERSION = 1
+
+#Which random draw is which inside a round, so keyed streams (replay.KeyedStream) can hand out the
+#same number for the same fight/round/draw no matter how the batch was split up.
+HERO_ATTACK, HERO_DAMAGE, VILLAIN_ATTACK, VILLAIN_DAMAGE, HERO_INIT, VILLAIN_INIT = range(6)
+
+
+#Default random source: draws straight from a numpy Generator in the order they're asked for.
+class _GeneratorStream:
+    def __init__(self, rng):
+        self.rng = np.random.default_rng(rng)
+
+    def d20(self, fights, round_no, slot):
+        return self.rng.integers(1, 21, fights.size)
+
+    def damage(self, dmg, fights, round_no, slot):
+        return dmg.sample(self.rng, fights.size)
+
+
+class DuelResult:
+    def __init__(self, hero_wins, villain_wins, rounds, hero_hp, villain_hp, hero_first, first_fight=0):
+        #Fight i in these arrays is fight number first_fight + i of the batch.
+        self.first_fight = first_fight
+        self.hero_wins = hero_wins
+        self.villain_wins = villain_wins
+        self.rounds = rounds
+        self.hero_hp = hero_hp
+        self.villain_hp = villain_hp
+        self.hero_first = hero_first
+        #Only filled in when the duels were run with track=True: per fight, total damage dealt,
+        #natural 20s and attacks made by each side.
+        self.hero_damage = self.villain_damage = None
+        self.hero_crits = self.villain_crits = None
+        self.hero_swings = self.villain_swings = None
+
+    def __len__(self):
+        return len(self.rounds)
+
+    def win_rate(self):
+        return float(self.hero_wins.mean())
+
+    def draws(self):
+        return int(len(self) - self.hero_wins.sum() - self.villain_wins.sum())
+
+
+#One side of a batch of duels: its HP for every fight plus the stats it attacks with.
+#With one fighter the stats are plain numbers. With several (simulate_matchups) every stat is an
+#array with one entry per fight, and damage is rolled separately for each kind of dice.
+class _Side:
+    def __init__(self, fighters, counts, actor, attack_slot, damage_slot):
+        self.actor = actor
+        self.attack_slot = attack_slot
+        self.damage_slot = damage_slot
+        self.swings = None
+        if len(fighters) == 1:
+            fighter = fighters[0]
+            self.hp = np.full(counts[0], fighter.HP, dtype=np.int32)
+            self.init = fighter.init
+            self.ac = fighter.ac
+            self.atkmod = fighter.atkmod
+            self.damage = dice.compile(fighter.damage)
+            self.codes = None
+            return
+        def column(values, dtype=np.int32):
+            return np.repeat(np.asarray(values, dtype=dtype), counts)
+        self.hp = column([f.HP for f in fighters])
+        self.init = column([f.init for f in fighters])
+        self.ac = column([f.ac for f in fighters])
+        self.atkmod = column([f.atkmod for f in fighters])
+        kinds = {}
+        for f in fighters:
+            kinds.setdefault(dice.compile(f.damage), len(kinds))
+        self.damage = list(kinds)
+        self.codes = column([kinds[dice.compile(f.damage)] for f in fighters], np.int16)
+
+    #Start keeping per-fight totals of damage dealt, crits and attacks.
+    def track(self):
+        self.dealt = np.zeros(self.hp.size, dtype=np.int32)
+        self.crits = np.zeros(self.hp.size, dtype=np.int32)
+        self.swings = np.zeros(self.hp.size, dtype=np.int32)
+
+    def at(self, stat, idx):
+        return stat if self.codes is None else stat[idx]
+
+    def roll_damage(self, stream, idx, fights, round_no):
+        if self.codes is None:
+            return stream.damage(self.damage, fights, round_no, self.damage_slot)
+        codes = self.codes[idx]
+        out = np.empty(idx.size, dtype=np.int32)
+        for code in np.unique(codes):
+            mask = codes == code
+            out[mask] = stream.damage(self.damage[code], fights[mask], round_no, self.damage_slot)
+        return out
+
+
+#attacker swings at defender in the fights listed in idx (fight numbers are idx + first_fight).
+def _attack(attacker, defender, idx, stream, round_no, first_fight=0, log=None):
+    if idx.size == 0:
+        return
+    fights = idx + first_fight if first_fight else idx
+    atk_roll = stream.d20(fights, round_no, attacker.attack_slot)
+    crit = atk_roll == 20
+    hit = crit | ((atk_roll != 1) & (atk_roll + attacker.at(attacker.atkmod, idx) >= defender.at(defender.ac, idx)))
+    hits = np.flatnonzero(hit)
+    damage = None
+    if hits.size:
+        damage = attacker.roll_damage(stream, idx[hits], fights[hits], round_no)
+        damage[crit[hits]] *= 2
+        defender.hp[idx[hits]] -= damage
+    if attacker.swings is not None:
+        attacker.swings[idx] += 1
+        if hits.size:
+            attacker.dealt[idx[hits]] += damage
+            attacker.crits[idx[hits]] += crit[hits]
+    if log is not None:
+        _log_attacks(log, attacker, defender, idx, fights, round_no, atk_roll, hit, crit, hits, damage)
+
+
+def _log_attacks(log, attacker, defender, idx, fights, round_no, atk_roll, hit, crit, hits, damage):
+    from combat_log import EVENT_DTYPE, MISS, HIT, CRIT, FUMBLE
+    events = np.zeros(idx.size, dtype=EVENT_DTYPE)
+    events["fight"] = fights
+    events["round"] = round_no
+    events["actor"] = attacker.actor
+    events["roll"] = atk_roll
+    events["outcome"] = np.where(crit, CRIT, np.where(hit, HIT, np.where(atk_roll == 1, FUMBLE, MISS)))
+    if damage is not None:
+        events["damage"][hits] = damage
+    events["hp"] = defender.hp[idx]
+    log.write_array(events)
+
+
+#rng is a seed, a numpy Generator, or a keyed stream like replay.KeyedStream (anything with
+#d20() and damage() methods). The fights are numbered first_fight .. first_fight + n - 1, which only
+#matters for keyed streams and the log.
+#log is an optional combat_log.EventSink that gets every swing.
+#track=True also fills in the damage/crit/attack totals on the result (a little slower).
+def simulate_duels(hero, villain, n, rng=None, max_rounds=MAX_ROUNDS, log=None, first_fight=0, track=False):
+    stream = rng if hasattr(rng, "d20") else _GeneratorStream(rng)
+    actors = (log.actor_id("Hero"), log.actor_id("Villain")) if log is not None else (0, 1)
+    a = _Side([hero], [n], actors[0], HERO_ATTACK, HERO_DAMAGE)
+    b = _Side([villain], [n], actors[1], VILLAIN_ATTACK, VILLAIN_DAMAGE)
+    if track:
+        a.track()
+        b.track()
+    hero_first, rounds = _fight(a, b, n, stream, max_rounds, log, first_fight)
+    result = DuelResult(b.hp <= 0, a.hp <= 0, rounds, a.hp, b.hp, hero_first, first_fight)
+    if track:
+        _add_totals(result, a, b, slice(None))
+    return result
+
+
+#Several different matchups in one vectorized batch: pairs is a list of (hero, villain) and
+#duels is how many duels each one gets (one number for all of them, or a list).
+#Returns a DuelResult per pair, fight numbers restart at 0 for each pair. rng can be a seed, a
+#Generator or a per-pair stream such as replay.MultiKeyedStream.
+def simulate_matchups(pairs, duels, rng=None, max_rounds=MAX_ROUNDS, track=False):
+    counts = [duels] * len(pairs) if isinstance(duels, int) else list(duels)
+    n = sum(counts)
+    stream = rng if hasattr(rng, "d20") else _GeneratorStream(rng)
+    a = _Side([hero for hero, _ in pairs], counts, 0, HERO_ATTACK, HERO_DAMAGE)
+    b = _Side([villain for _, villain in pairs], counts, 1, VILLAIN_ATTACK, VILLAIN_DAMAGE)
+    if track:
+        a.track()
+        b.track()
+    hero_first, rounds = _fight(a, b, n, stream, max_rounds)
+    results = []
+    start = 0
+    for count in counts:
+        part = slice(start, start + count)
+        results.append(DuelResult(b.hp[part] <= 0, a.hp[part] <= 0, rounds[part], a.hp[part], b.hp[part],
+                                  hero_first[part]))
+        if track:
+            _add_totals(results[-1], a, b, part)
+        start += count
+    return results
+
+
+def _add_totals(result, a, b, part):
+    result.hero_damage, result.villain_damage = a.dealt[part], b.dealt[part]
+    result.hero_crits, result.villain_crits = a.crits[part], b.crits[part]
+    result.hero_swings, result.villain_swings = a.swings[part], b.swings[part]
+
+
+#The shared round loop. Returns (hero_first, rounds) and leaves the final HP in a.hp and b.hp.
+def _fight(a, b, n, stream, max_rounds, log=None, first_fight=0):
+    everyone = np.arange(first_fight, first_fight + n)
+    hero_first = (stream.d20(everyone, 0, HERO_INIT) + a.init
+                  >= stream.d20(everyone, 0, VILLAIN_INIT) + b.init)
+    rounds = np.zeros(n, dtype=np.int32)
+
+    live = np.arange(n)
+    for r in range(1, max_rounds + 1):
+        if live.size == 0:
+            break
+        rounds[live] = r
+        first = hero_first[live]
+        _attack(a, b, live[first], stream, r, first_fight, log)
+        _attack(b, a, live[~first], stream, r, first_fight, log)
+        #Whoever went second only swings if they are still standing.
+        live = live[(a.hp[live] > 0) & (b.hp[live] > 0)]
+        first = hero_first[live]
+        _attack(b, a, live[first], stream, r, first_fight, log)
+        _attack(a, b, live[~first], stream, r, first_fight, log)
+        live = live[(a.hp[live] > 0) & (b.hp[live] > 0)]
+    return hero_first, rounds
+
+
+if __name__ == "__main__":
+    from combatants import party, bestiary
+    start = time.perf_counter()
+    result = simulate_duels(party["Astarion"], bestiary["Orc"], 1_000_000, rng=1)
+    elapsed = time.perf_counter() - start
+    print(f"Astarion beats the Orc {result.win_rate():.2%} of the time")
+    print(f"Average fight length: {result.rounds.mean():.2f} rounds")
+    print(f"{len(result):,} duels in {elapsed:.2f}s")
@@ -0,0 +1,130 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - exact duel odds
+
+#Works out the exact odds of a duel instead of simulating it. Every attack is independent of
+#HP, so each side's damage is its own little Markov chain over "damage taken so far":
+# - kill_curve() steps one attacker's chain and records when the target drops.
+# - solve_duel() lines the two chains up in initiative order to get the win chance, the chance
+#   the fight lasts k rounds, and the HP the winner has left.
+#Same rules as duel_engine (nat 20 hits for double damage, nat 1 misses, hero wins init ties).
+
+import time
+
+import numpy as np
+
+import dice
+from duel_engine import MAX_ROUNDS
+
+#Stop once the chance that both sides are still standing drops below this.
+TOLERANCE = 1e-12
+
+
+#Chance that d20 + init_a >= d20 + init_b.
+def first_move_chance(init_a, init_b):
+    rolls = np.arange(1, 21)
+    return float(np.mean(rolls[:, None] + init_a >= rolls[None, :] + init_b))
+
+
+#Damage distribution of one swing: index 0 is a miss (or a 0 damage hit).
+def attack_pmf(atkmod, ac, damage):
+    hit_dmg = dice.pmf(damage)
+    crit_dmg = np.zeros(2 * len(hit_dmg) - 1)
+    crit_dmg[::2] = hit_dmg
+    #Rolls 2-19 only hit if they beat the AC, 20 always crits, 1 always misses.
+    hits = sum(1 for r in range(2, 20) if r + atkmod >= ac)
+    out = crit_dmg / 20
+    out[:len(hit_dmg)] += hit_dmg * hits / 20
+    out[0] += (19 - hits) / 20
+    return out
+
+
+#Steps one attacker against a target with `hp` HP for up to max_attacks swings.
+#Returns three arrays indexed by number of swings m (0..max_attacks):
+#   dies[m]  - chance the target drops on swing m exactly
+#   alive[m] - chance the target is still up after m swings
+#   hp_left[m] - expected HP left on the target, counting only the fights where it's still up
+def kill_curve(pmf, hp, max_attacks):
+    if hp < 1:
+        raise ValueError(f"target needs at least 1 HP, got {hp}")
+    dies = np.zeros(max_attacks + 1)
+    alive = np.zeros(max_attacks + 1)
+    hp_left = np.zeros(max_attacks + 1)
+    left = hp - np.arange(hp)
+    taken = np.zeros(hp)
+    taken[0] = 1.0
+    alive[0] = 1.0
+    hp_left[0] = hp
+    for m in range(1, max_attacks + 1):
+        spread = np.convolve(taken, pmf)
+        taken = spread[:hp]
+        dies[m] = spread[hp:].sum()
+        alive[m] = taken.sum()
+        hp_left[m] = taken @ left
+        if alive[m] < TOLERANCE:
+            break
+    return dies, alive, hp_left
+
+
+class DuelOdds:
+    def __init__(self, hero_win, villain_win, rounds, hero_hp_left, villain_hp_left):
+        self.hero_win = hero_win
+        self.villain_win = villain_win
+        self.draw = max(0.0, 1.0 - hero_win - villain_win)
+        #rounds[k] is the chance the fight ends in round k.
+        self.rounds = rounds
+        #Expected HP the winner has left, given that side won.
+        self.hero_hp_left = hero_hp_left
+        self.villain_hp_left = villain_hp_left
+
+    def expected_rounds(self):
+        return float(np.arange(len(self.rounds)) @ self.rounds / max(self.rounds.sum(), TOLERANCE))
+
+    def __repr__(self):
+        return (f"DuelOdds(hero_win={self.hero_win:.6f}, villain_win={self.villain_win:.6f}, "
+                f"draw={self.draw:.2e}, rounds~{self.expected_rounds():.2f})")
+
+
+def solve_duel(hero, villain, max_rounds=MAX_ROUNDS):
+    #A fighter at 0 HP never gets a fight to be solved, so say so instead of guessing a winner.
+    for side, fighter in (("hero", hero), ("villain", villain)):
+        if fighter.HP < 1:
+            raise ValueError(f"{side} needs at least 1 HP to duel, got {fighter.HP}")
+    k = max_rounds
+    a_dies, a_alive, a_left = kill_curve(attack_pmf(villain.atkmod, hero.ac, villain.damage), hero.HP, k)
+    b_dies, b_alive, b_left = kill_curve(attack_pmf(hero.atkmod, villain.ac, hero.damage), villain.HP, k)
+    p_first = first_move_chance(hero.init, villain.init)
+    now = slice(1, k + 1)
+    before = slice(0, k)
+
+    #Hero first: in round r the hero makes swing r after taking r-1 swings, the villain's
+    #swing r comes after the hero has made r swings. Villain first is the mirror image.
+    hero_wins_r = p_first * b_dies[now] * a_alive[before] + (1 - p_first) * b_dies[now] * a_alive[now]
+    villain_wins_r = p_first * a_dies[now] * b_alive[now] + (1 - p_first) * a_dies[now] * b_alive[before]
+    hero_hp_r = p_first * b_dies[now] * a_left[before] + (1 - p_first) * b_dies[now] * a_left[now]
+    villain_hp_r = p_first * a_dies[now] * b_left[now] + (1 - p_first) * a_dies[now] * b_left[before]
+
+    hero_win = float(hero_wins_r.sum())
+    villain_win = float(villain_wins_r.sum())
+    rounds = np.concatenate([[0.0], hero_wins_r + villain_wins_r])
+    last = np.flatnonzero(rounds > 0)
+    rounds = rounds[:last[-1] + 1] if last.size else rounds[:1]
+    return DuelOdds(
+        hero_win,
+        villain_win,
+        rounds,
+        float(hero_hp_r.sum() / hero_win) if hero_win > 0 else 0.0,
+        float(villain_hp_r.sum() / villain_win) if villain_win > 0 else 0.0,
+    )
+
+
+if __name__ == "__main__":
+    from combatants import party, bestiary
+    for hero_name, hero in party.items():
+        for villain_name, villain in bestiary.items():
+            start = time.perf_counter()
+            odds = solve_duel(hero, villain)
+            elapsed = time.perf_counter() - start
+            print(f"{hero_name:>11} vs {villain_name:<10} {odds.hero_win:7.2%}  "
+                  f"{odds.expected_rounds():5.2f} rounds  {odds.hero_hp_left:5.1f} HP left  "
+                  f"({elapsed * 1000:.1f} ms)")
@@ -0,0 +1,229 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Big factorials
+
+#HW14 works out p! with o *= z, one number at a time. Every step multiplies a huge number by a
+#small one, so big p gets slow, and print() then has to turn the answer into decimal digits,
+#which Python's int does in quadratic time (10^6! has 5.5 million digits, and that's minutes).
+#This does it differently:
+# - Binary splitting: the numbers are multiplied in a balanced tree (1*2*...*k, (k+1)*...*2k,
+#   then those pairs, and so on), so the big multiplications happen between numbers of about the
+#   same size, where fast multiplication pays off.
+# - The tree is built out of decimal.Decimal, not int. The decimal module's C library (libmpdec)
+#   multiplies huge numbers with a number-theoretic transform, much quicker than int's Karatsuba,
+#   and since it already stores base-10 digits, str() of the answer is basically free. Small
+#   stretches at the bottom of the tree are still multiplied as ints, which is quicker for small
+#   numbers.
+# - FactorialCache remembers recent answers: asking for n! after m! (m < n) only multiplies in
+#   m+1 ... n.
+# - workers > 1 splits 1..n into pieces for a process pool, then multiplies the pieces together.
+#factorial(n) gives a plain int (same tree, int multiplication) for doing more maths with.
+#factorial_str(n) and write_factorial(n, out) go through the Decimal version for the digits, which
+#is the fast way to get them: int() of a huge Decimal or str() of a huge int are both quadratic.
+#factorial_decimal(n) hands back that Decimal itself, and any more maths on it should go through
+#EXACT so nothing is rounded to the default 28 digits.
+#
+#   python factorial.py 1000000                digits of 10^6! to the screen
+#   python factorial.py 1000000 --out f.txt    or to a file, a chunk at a time
+#   python factorial.py --bench
+
+import argparse
+import math
+import operator
+import sys
+import time
+from bisect import bisect_right, insort
+from collections import OrderedDict
+from decimal import MAX_EMAX, MAX_PREC, MIN_EMIN, Context, Decimal
+
+#A context that never rounds, for multiplying exact integers of any size.
+EXACT = Context(prec=MAX_PREC, Emax=MAX_EMAX, Emin=MIN_EMIN)
+#Leaves of the tree are int products up to about this many bits before they become Decimals.
+LEAF_BITS = 2048
+#Characters per write() when streaming digits out.
+WRITE_CHUNK = 1 << 20
+
+
+def _multiply_exact(a, b):
+    return EXACT.multiply(a, b)
+
+
+#How each kind of answer multiplies, and how a small int becomes one.
+KINDS = {
+    "decimal": (_multiply_exact, Decimal),
+    "int": (operator.mul, int),
+}
+
+
+#Multiplies a list pairwise, so every multiplication is between similar sizes.
+def _tree(values, multiply):
+    while len(values) > 1:
+        paired = [multiply(values[i], values[i + 1]) for i in range(0, len(values) - 1, 2)]
+        if len(values) % 2:
+            paired.append(values[-1])
+        values = paired
+    return values[0]
+
+
+#lo * (lo + 1) * ... * (hi - 1), exactly, as a Decimal (kind="decimal") or an int (kind="int").
+def product(lo, hi, kind="decimal"):
+    multiply, convert = KINDS[kind]
+    leaves = []
+    leaf = 1
+    for k in range(max(lo, 1), hi):
+        leaf *= k
+        if leaf.bit_length() >= LEAF_BITS:
+            leaves.append(convert(leaf))
+            leaf = 1
+    if leaf != 1 or not leaves:
+        leaves.append(convert(leaf))
+    return _tree(leaves, multiply)
+
+
+#Splits lo..hi into `parts` pieces with about the same number of digits in each product (the
+#top numbers have more digits, so their pieces are a bit shorter).
+def _split(lo, hi, parts):
+    digits = lambda k: math.lgamma(k) if k > 0 else 0.0
+    total = digits(hi) - digits(lo)
+    edges = [lo]
+    for part in range(1, parts):
+        target = digits(lo) + total * part / parts
+        left, right = edges[-1], hi
+        while left < right:
+            mid = (left + right) // 2
+            if digits(mid) < target:
+                left = mid + 1
+            else:
+                right = mid
+        edges.append(left)
+    edges.append(hi)
+    return [(a, b) for a, b in zip(edges, edges[1:]) if a < b]
+
+
+#lo * ... * (hi - 1), the pieces done on a process pool when workers > 1.
+def parallel_product(lo, hi, workers=1, kind="decimal"):
+    pieces = _split(lo, hi, workers) if workers > 1 else []
+    if len(pieces) < 2:
+        return product(lo, hi, kind)
+    from concurrent.futures import ProcessPoolExecutor
+    starts, stops = zip(*pieces)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        return _tree(list(pool.map(product, starts, stops, [kind] * len(pieces))), KINDS[kind][0])
+
+
+class FactorialCache:
+    def __init__(self, max_entries=8, kind="decimal"):
+        self.max_entries = max_entries
+        self.kind = kind
+        #n -> n!, most recently used last, plus the same n's sorted for finding the nearest one below.
+        self._memory = OrderedDict()
+        self._sorted = []
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self._memory)
+
+    def factorial(self, n, workers=1):
+        if n < 0:
+            raise ValueError("factorial of a negative number")
+        answer = self._memory.get(n)
+        if answer is not None:
+            self.hits += 1
+            self._memory.move_to_end(n)
+            return answer
+        self.misses += 1
+        #Start from the biggest m! we already have with m < n (or 0! = 1).
+        below = bisect_right(self._sorted, n)
+        m = self._sorted[below - 1] if below else 0
+        multiply, convert = KINDS[self.kind]
+        start = self._memory[m] if below else convert(1)
+        answer = multiply(start, parallel_product(m + 1, n + 1, workers, self.kind))
+        self._memory[n] = answer
+        insort(self._sorted, n)
+        while len(self._memory) > self.max_entries:
+            old, _ = self._memory.popitem(last=False)
+            self._sorted.remove(old)
+        return answer
+
+
+_caches = {kind: FactorialCache(kind=kind) for kind in KINDS}
+
+
+#n! as an int, from the shared cache.
+def factorial(n, workers=1):
+    return _caches["int"].factorial(n, workers)
+
+
+#n! as an exact Decimal, from the shared cache.
+def factorial_decimal(n, workers=1):
+    return _caches["decimal"].factorial(n, workers)
+
+
+def factorial_str(n, workers=1):
+    return str(factorial_decimal(n, workers))
+
+
+#Writes the digits of n! to `out` (anything with write(), text) WRITE_CHUNK characters at a time,
+#so a pipe starts getting digits straight away. Returns the number of digits.
+def write_factorial(n, out, workers=1):
+    digits = factorial_str(n, workers)
+    for start in range(0, len(digits), WRITE_CHUNK):
+        out.write(digits[start:start + WRITE_CHUNK])
+    out.write("\n")
+    return len(digits)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Exact factorials with all their digits")
+    parser.add_argument("n", type=int, nargs="?", default=None)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--out", help="write the digits to this file instead of the screen")
+    parser.add_argument("--bench", action="store_true")
+    args = parser.parse_args()
+
+    if args.n is not None:
+        if args.out:
+            with open(args.out, "w") as f:
+                count = write_factorial(args.n, f, args.workers)
+            print(f"{args.n}! has {count:,} digits, written to {args.out}")
+        else:
+            try:
+                write_factorial(args.n, sys.stdout, args.workers)
+            except BrokenPipeError:
+                sys.stderr.close()
+        sys.exit(0)
+
+    #Same as the HW14 loop (and math.factorial) on numbers small enough to check that way. Python
+    #refuses to print ints over 4300 digits unless told to, because of how slow it is.
+    sys.set_int_max_str_digits(0)
+    for n in (0, 1, 5, 20, 100, 1000, 5000):
+        o = 1
+        for z in range(1, n + 1):
+            o *= z
+        assert factorial_str(n) == str(o) == str(math.factorial(n)), n
+        assert factorial(n) == o and type(factorial(n)) is int, n
+    assert factorial_str(30_000) == str(math.factorial(30_000))
+    print("Matches the HW14 loop and math.factorial")
+
+    n = 100_000
+    start = time.perf_counter()
+    o = 1
+    for z in range(1, n + 1):
+        o *= z
+    loop = time.perf_counter() - start
+    start = time.perf_counter()
+    text = str(o)
+    print(f"HW14 loop for {n:,}!: {loop:.2f}s to multiply, {time.perf_counter() - start:.2f}s to print")
+
+    cache = FactorialCache()
+    for n in (100_000, 1_000_000):
+        start = time.perf_counter()
+        digits = str(cache.factorial(n))
+        print(f"{n:,}! here: {len(digits):,} digits in {time.perf_counter() - start:.2f}s "
+              f"(starts {digits[:12]}..., ends ...{digits.rstrip('0')[-6:]} then {len(digits) - len(digits.rstrip('0')):,} zeros)")
+    start = time.perf_counter()
+    cache.factorial(1_000_000)
+    cache.factorial(1_000_500)
+    print(f"1,000,000! again and then 1,000,500!: {time.perf_counter() - start:.3f}s "
+          f"({cache.hits} hit, {cache.misses} worked out in total)")
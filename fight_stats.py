@@ -0,0 +1,196 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - fight statistics
+
+#Distributions of how fights go (not just who won) without keeping every fight in memory.
+#Each worker fills a FightStats from its DuelResults (run with track=True) and sends it back.
+#FightStats only holds fixed-size count arrays and a few running sums, so a billion fights take
+#the same memory as a thousand, and two of them add together (a + b) in any order or grouping and
+#give the same counts as one FightStats that saw every fight.
+#
+#   rounds        how many rounds the fight lasted (rounds to kill, draws sit at max_rounds)
+#   *_dpr         damage per round each side dealt over the whole fight
+#   *_crits       how many natural 20s each side rolled in a fight (crit_rate() is crits / attacks)
+#   overkill      how far below 0 HP the loser ended up
+
+import copy
+import time
+
+import numpy as np
+
+from duel_engine import MAX_ROUNDS
+from running_stats import RunningStats
+
+
+#Counts values in fixed bins of `width` from low up to high. Anything outside lands in the
+#under/over counters, and the exact min and max are kept so quantiles out there stay honest.
+class Histogram:
+    def __init__(self, low, high, width=1):
+        self.low = low
+        self.width = width
+        self.bins = int(np.ceil((high - low) / width))
+        self.high = low + self.bins * width
+        self.counts = np.zeros(self.bins, dtype=np.int64)
+        self.under = 0
+        self.over = 0
+        #Exact count, mean, variance, min and max next to the binned counts.
+        self.moments = RunningStats(None)
+
+    def _same_bins(self, other):
+        if (self.low, self.width, self.bins) != (other.low, other.width, other.bins):
+            raise ValueError("can only merge histograms with the same bins")
+
+    def add(self, values):
+        values = np.asarray(values).ravel()
+        if values.size == 0:
+            return self
+        self.moments.update(values)
+        slots = np.floor((values - self.low) / self.width).astype(np.int64)
+        inside = (slots >= 0) & (slots < self.bins)
+        self.under += int((slots < 0).sum())
+        self.over += int((slots >= self.bins).sum())
+        self.counts += np.bincount(slots[inside], minlength=self.bins)
+        return self
+
+    def merge(self, other):
+        self._same_bins(other)
+        self.counts += other.counts
+        self.under += other.under
+        self.over += other.over
+        self.moments.merge(other.moments)
+        return self
+
+    def __add__(self, other):
+        return self.empty_copy().merge(self).merge(other)
+
+    def empty_copy(self):
+        return Histogram(self.low, self.high, self.width)
+
+    @property
+    def count(self):
+        return self.moments.count
+
+    def mean(self):
+        return self.moments.mean
+
+    #Value below which a fraction q of everything added falls. Exact for whole numbers in width 1
+    #bins, otherwise interpolated inside the bin (off by at most one bin width).
+    def quantile(self, q):
+        if self.count == 0:
+            return float("nan")
+        target = q * self.count
+        if target <= self.under:
+            return self.moments.min
+        running = np.cumsum(self.counts) + self.under
+        slot = int(np.searchsorted(running, target))
+        if slot >= self.bins:
+            return self.moments.max
+        if self.width == 1 and isinstance(self.low, int):
+            return self.low + slot
+        before = running[slot] - self.counts[slot]
+        inside = (target - before) / self.counts[slot]
+        return min(max(self.low + (slot + inside) * self.width, self.moments.min), self.moments.max)
+
+    def quantiles(self, qs=(0.05, 0.25, 0.5, 0.75, 0.95)):
+        return {q: self.quantile(q) for q in qs}
+
+
+class FightStats:
+    def __init__(self, max_rounds=MAX_ROUNDS, max_damage=256, dpr_width=0.25):
+        self.rounds = Histogram(1, max_rounds + 1)
+        self.hero_dpr = Histogram(0, max_damage, dpr_width)
+        self.villain_dpr = Histogram(0, max_damage, dpr_width)
+        self.hero_crits = Histogram(0, 64)
+        self.villain_crits = Histogram(0, 64)
+        self.overkill = Histogram(0, 2 * max_damage)
+        self.fights = 0
+        self.hero_wins = 0
+        self.villain_wins = 0
+        self.hero_swings = 0
+        self.villain_swings = 0
+
+    def _parts(self):
+        return ("rounds", "hero_dpr", "villain_dpr", "hero_crits", "villain_crits", "overkill")
+
+    #result is a duel_engine.DuelResult from simulate_duels(..., track=True).
+    def add(self, result):
+        if result.hero_damage is None:
+            raise ValueError("run the duels with track=True to get damage and crit totals")
+        self.fights += len(result)
+        self.hero_wins += int(result.hero_wins.sum())
+        self.villain_wins += int(result.villain_wins.sum())
+        self.hero_swings += int(result.hero_swings.sum())
+        self.villain_swings += int(result.villain_swings.sum())
+        self.rounds.add(result.rounds)
+        self.hero_dpr.add(result.hero_damage / result.rounds)
+        self.villain_dpr.add(result.villain_damage / result.rounds)
+        self.hero_crits.add(result.hero_crits)
+        self.villain_crits.add(result.villain_crits)
+        self.overkill.add(np.concatenate([-result.villain_hp[result.hero_wins], -result.hero_hp[result.villain_wins]]))
+        return self
+
+    def merge(self, other):
+        for part in self._parts():
+            getattr(self, part).merge(getattr(other, part))
+        self.fights += other.fights
+        self.hero_wins += other.hero_wins
+        self.villain_wins += other.villain_wins
+        self.hero_swings += other.hero_swings
+        self.villain_swings += other.villain_swings
+        return self
+
+    def __add__(self, other):
+        return copy.deepcopy(self).merge(other)
+
+    def win_rate(self):
+        return self.hero_wins / self.fights if self.fights else 0.0
+
+    #Fraction of attacks that were natural 20s, for (hero, villain).
+    def crit_rate(self):
+        return (self.hero_crits.mean() * self.fights / max(self.hero_swings, 1),
+                self.villain_crits.mean() * self.fights / max(self.villain_swings, 1))
+
+    def summary(self):
+        lines = [f"{self.fights:,} fights, hero wins {self.win_rate():.2%}"]
+        for part in self._parts():
+            hist = getattr(self, part)
+            q = hist.quantiles()
+            lines.append(f"{part:<14} mean {hist.mean():7.2f}  " +
+                         "  ".join(f"p{int(k * 100):02d} {v:6.2f}" for k, v in q.items()))
+        hero, villain = self.crit_rate()
+        lines.append(f"crit rate      hero {hero:.3%}  villain {villain:.3%}")
+        return "\n".join(lines)
+
+
+#One worker's share: `chunks` batches of `size` duels, summed into one FightStats.
+def collect(hero, villain, chunks, size, seed=None):
+    from duel_engine import simulate_duels
+    rng = np.random.default_rng(seed)
+    stats = FightStats()
+    for _ in range(chunks):
+        stats.add(simulate_duels(hero, villain, size, rng=rng, track=True))
+    return stats
+
+
+if __name__ == "__main__":
+    import functools
+    import os
+    from concurrent.futures import ProcessPoolExecutor
+    from combatants import party, bestiary
+
+    hero, villain = party["LaeZel"], bestiary["Troll"]
+    workers = os.cpu_count()
+    seeds = np.random.SeedSequence(2025).spawn(8)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        parts = list(pool.map(collect, [hero] * 8, [villain] * 8, [5] * 8, [200_000] * 8, seeds))
+    total = functools.reduce(lambda a, b: a + b, parts)
+    size = sum(getattr(total, p).counts.nbytes for p in total._parts())
+    print(f"{total.fights:,} fights in {time.perf_counter() - start:.1f}s on {workers} workers, "
+          f"{size // 1024} KB of counts per FightStats")
+    print(total.summary())
+
+    #Merging in a different grouping gives the same counts.
+    other = (parts[7] + parts[3]) + functools.reduce(lambda a, b: b + a, parts[:3] + parts[4:7])
+    print("Same counts merged another way:", all((getattr(total, p).counts == getattr(other, p).counts).all()
+                                                  for p in total._parts()))
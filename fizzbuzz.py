@@ -0,0 +1,275 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: FizzBuzz in bulk
+
+#HW13's FizzBuzz (same spelling: "Fizzbuzz") for any range, written to a file or a pipe as fast as
+#it can go. Which lines say Fizz/Buzz repeats every 15 numbers, and the last 4 digits of the
+#numbers repeat every 10,000, so every stretch of 30,000 numbers starting at a multiple of 30,000
+#looks exactly the same apart from the digits in front of those last 4, and those only change
+#twice in the whole stretch (every 10,000 numbers). While the numbers all have the same number of
+#digits, a chunk is one cached 30,000-number window copied over and over, with just those front
+#digits written in. The bits that don't line up with a window (the start, the end, and around a
+#change in digit count like 99999 -> 100000) fill in 15-number blocks with numpy instead, and the
+#last few numbers are done the ordinary way.
+#Chunks are written with os.writev a few at a time, straight from the numpy arrays, so they never
+#get joined into one big string. With workers > 1 a process pool renders chunks while earlier ones
+#are being written, and they still come out in order.
+#
+#   python fizzbuzz.py 100                    same as HW13
+#   python fizzbuzz.py 1000000000 > out.txt   up to a billion (about 7.7 GB)
+#   python fizzbuzz.py --bench                speed to /dev/null, checked against the simple way
+
+import argparse
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+
+FIZZ = b"Fizz"
+BUZZ = b"Buzz"
+FIZZBUZZ = b"Fizzbuzz"
+#Last LOW digits of a number repeat every 10^LOW numbers, Fizz/Buzz every 15, both every WINDOW.
+LOW = 4
+WINDOW = 3 * 10 ** LOW
+#Numbers per chunk, a whole number of windows (chunks after the first line up with them). About
+#7-10 MB of output.
+CHUNK = 32 * WINDOW
+#Bytes handed to one os.writev call.
+WRITE_SIZE = 1 << 25
+#Positions (0-14) in a block starting at a number 1 more than a multiple of 15 that are numbers.
+NUMBER_SLOTS = (0, 1, 3, 6, 7, 10, 12, 13)
+
+
+#One line of FizzBuzz, the way HW13 does it.
+def line(i):
+    if i % 15 == 0:
+        return FIZZBUZZ + b"\n"
+    if i % 3 == 0:
+        return FIZZ + b"\n"
+    if i % 5 == 0:
+        return BUZZ + b"\n"
+    return b"%d\n" % i
+
+
+def _simple(start, stop):
+    return b"".join(line(i) for i in range(start, stop))
+
+
+#Template row for one 15-number block of `digits`-digit numbers, and where each number's digits start.
+@lru_cache(maxsize=None)
+def _template(digits):
+    import numpy as np
+    row = bytearray()
+    columns = []
+    for slot in range(15):
+        if slot in NUMBER_SLOTS:
+            columns.append(len(row))
+            row += b"0" * digits + b"\n"
+        else:
+            row += line(slot + 1)
+    return np.frombuffer(bytes(row), dtype=np.uint8), columns
+
+
+#"00" to "99" as pairs of characters, so the digits go in two at a time.
+@lru_cache(maxsize=None)
+def _pairs():
+    import numpy as np
+    return np.frombuffer(b"".join(b"%02d" % i for i in range(100)), dtype=np.uint8).reshape(100, 2)
+
+
+#FizzBuzz for `blocks` whole blocks starting at `first` (first % 15 == 1), all `digits` digits long.
+def _blocks(first, blocks, digits):
+    import numpy as np
+    template, columns = _template(digits)
+    pairs = _pairs()
+    #Dividing uint32s is a good deal quicker than uint64s, and covers everything below 4.2 billion.
+    kind = np.uint32 if first + blocks * 15 < 1 << 32 else np.uint64
+    hundred = kind(100)
+    grid = np.tile(template, (blocks, 1))
+    base = (first + np.arange(blocks, dtype=np.uint64) * 15).astype(kind)
+    for slot, column in zip(NUMBER_SLOTS, columns):
+        values = base + kind(slot)
+        place = column + digits
+        while place - column >= 2:
+            higher = values // hundred
+            grid[:, place - 2:place] = pairs[values - higher * hundred]
+            values = higher
+            place -= 2
+        if place > column:
+            grid[:, column] = values + kind(ord("0"))
+    return grid.tobytes()
+
+
+#One 30,000-number window of `digits`-digit numbers, with zeros in front of the last LOW digits.
+#Also returns, for each 10,000-number third of the window, where those front digits go: an array
+#of byte positions with one row per number in that third.
+@lru_cache(maxsize=None)
+def _window(digits):
+    import numpy as np
+    front = digits - LOW
+    row = bytearray()
+    starts = ([], [], [])
+    for i in range(WINDOW):
+        if i % 3 and i % 5:
+            starts[i // 10 ** LOW].append(len(row))
+            row += b"0" * front + b"%0*d\n" % (LOW, i % 10 ** LOW)
+        else:
+            row += line(i)
+    template = np.frombuffer(bytes(row), dtype=np.uint8)
+    return template, [np.array(third)[:, None] + np.arange(front) for third in starts]
+
+
+#`count` windows starting at `first` (a multiple of WINDOW), all `digits` digits long.
+def _windows(first, count, digits):
+    import numpy as np
+    template, spots = _window(digits)
+    grid = np.tile(template, (count, 1))
+    front = digits - LOW
+    for third, spot in enumerate(spots):
+        #Digits in front for this third of each window, one row per window.
+        highs = range(first // 10 ** LOW + third, first // 10 ** LOW + third + 3 * count, 3)
+        text = np.frombuffer(b"".join(b"%0*d" % (front, high) for high in highs), dtype=np.uint8)
+        grid[:, spot] = text.reshape(count, 1, front)
+    return grid
+
+
+#Numbers from start to stop, all `digits` digits long, in 15-number blocks plus loose ends.
+def _aligned(start, stop, digits):
+    first = start + (1 - start) % 15
+    blocks = max(0, (stop - first) // 15)
+    if not blocks:
+        return [_simple(start, stop)]
+    return [_simple(start, first), _blocks(first, blocks, digits), _simple(first + blocks * 15, stop)]
+
+
+#FizzBuzz for start <= i < stop as a list of pieces (bytes or uint8 arrays) to write in order.
+def _parts(start, stop):
+    parts = []
+    n = max(start, 1)
+    while n < stop:
+        digits = len(str(n))
+        end = min(stop, 10 ** digits)
+        first = -(-n // WINDOW) * WINDOW
+        count = (end - first) // WINDOW if digits > LOW else 0
+        if count > 0:
+            parts += _aligned(n, first, digits)
+            parts.append(_windows(first, count, digits))
+            parts += _aligned(first + count * WINDOW, end, digits)
+        else:
+            parts += _aligned(n, end, digits)
+        n = end
+    return parts
+
+
+#FizzBuzz for start <= i < stop.
+def render(start, stop):
+    return b"".join(bytes(part) for part in _parts(start, stop))
+
+
+#Writes every buffer in full, picking up where a partial os.writev left off.
+def _writev(fd, buffers):
+    views = [memoryview(b).cast("B") for b in buffers]
+    views = [view for view in views if len(view)]
+    while views:
+        written = os.writev(fd, views)
+        while views and written >= len(views[0]):
+            written -= len(views[0])
+            views.pop(0)
+        if views and written:
+            views[0] = views[0][written:]
+
+
+class _Writer:
+    def __init__(self, out):
+        self.out = out
+        self.fd = None
+        self.pending = []
+        self.size = 0
+        self.total = 0
+        if hasattr(os, "writev"):
+            try:
+                out.flush()
+                self.fd = out.fileno()
+            except (AttributeError, OSError, ValueError):
+                self.fd = None
+
+    def add(self, parts):
+        for data in parts:
+            size = memoryview(data).nbytes
+            self.total += size
+            if self.fd is None:
+                self.out.write(data)
+                continue
+            self.pending.append(data)
+            self.size += size
+            if self.size >= WRITE_SIZE or len(self.pending) >= 64:
+                self.flush()
+
+    def flush(self):
+        if self.pending:
+            _writev(self.fd, self.pending)
+        self.pending = []
+        self.size = 0
+
+
+#Writes FizzBuzz for start <= i < stop to `out` (a binary file like sys.stdout.buffer, or anything
+#with write()). Returns the number of bytes written.
+def write(out, start=1, stop=101, workers=1, chunk=CHUNK):
+    writer = _Writer(out)
+    #The first chunk runs up to a multiple of `chunk`, so the rest all start on a window.
+    edges = [start] + list(range((start // chunk + 1) * chunk, stop, chunk)) + [stop]
+    ranges = list(zip(edges, edges[1:]))
+    if workers > 1 and len(ranges) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            running = deque()
+            for lo, hi in ranges:
+                running.append(pool.submit(_parts, lo, hi))
+                #A couple of chunks per worker in flight, so memory stays flat however long the range.
+                if len(running) >= 2 * workers:
+                    writer.add(running.popleft().result())
+            while running:
+                writer.add(running.popleft().result())
+    else:
+        for lo, hi in ranges:
+            writer.add(_parts(lo, hi))
+    writer.flush()
+    return writer.total
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FizzBuzz from --start up to and including stop")
+    parser.add_argument("stop", type=int, nargs="?", default=100)
+    parser.add_argument("--start", type=int, default=1)
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--bench", action="store_true", help="time it writing to /dev/null instead")
+    args = parser.parse_args()
+
+    if not args.bench:
+        try:
+            write(sys.stdout.buffer, args.start, args.stop + 1, args.workers)
+        except BrokenPipeError:
+            #Piped into head or similar, which stopped reading.
+            sys.stderr.close()
+        sys.exit(0)
+
+    #Same bytes as the simple way, including across digit changes and for odd start points.
+    for lo, hi in ((1, 101), (1, 20_000), (7, 1_003), (99_990, 100_020), (9_999_980, 10_000_111),
+                   (29_990, 150_017), (4_294_900_000, 4_295_100_000)):
+        assert render(lo, hi) == _simple(lo, hi), (lo, hi)
+    print("Matches HW13's rules on all the check ranges")
+
+    stop = 10 ** 8
+    with open(os.devnull, "wb") as null:
+        start = time.perf_counter()
+        count = stop // 100
+        loop = sum(len(line(i)) for i in range(1, count + 1))
+        loop_rate = loop / (time.perf_counter() - start)
+        print(f"One line at a time: {loop_rate / 1e6:,.0f} MB/s")
+        for workers in sorted({1, os.cpu_count()}):
+            start = time.perf_counter()
+            written = write(null, 1, stop + 1, workers)
+            elapsed = time.perf_counter() - start
+            print(f"1 to {stop:,} on {workers} worker(s): {written / 1e6:,.0f} MB in {elapsed:.2f}s, "
+                  f"{written / elapsed / 1e6:,.0f} MB/s")
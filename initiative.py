@@ -0,0 +1,212 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - initiative order for big fights
+
+#Runs fights with any number of combatants on any number of sides (the whole party against a
+#horde of goblins) instead of hand-writing an if/elif branch for every pair.
+#Turn order lives in a priority queue keyed by (round, -initiative roll, side, tiebreak): the
+#fighter at the top takes their turn and goes back in for the next round. A fighter who dies is
+#pulled out of the queue right away in O(log n), so a fight with n fighters costs about n log n
+#per round. Attack rules are the same as duel_engine.
+
+import random
+import time
+
+import dice
+
+
+#Binary heap that also remembers where each item sits, so any item can be removed in O(log n).
+class InitiativeQueue:
+    def __init__(self):
+        self._heap = []
+        self._keys = {}
+        self._where = {}
+
+    def __len__(self):
+        return len(self._heap)
+
+    def __contains__(self, item):
+        return item in self._where
+
+    def push(self, item, key):
+        self._heap.append(item)
+        self._keys[item] = key
+        self._where[item] = len(self._heap) - 1
+        self._up(len(self._heap) - 1)
+
+    def peek(self):
+        return self._heap[0]
+
+    def key(self, item):
+        return self._keys[item]
+
+    def pop(self):
+        item = self._heap[0]
+        self.remove(item)
+        return item
+
+    def remove(self, item):
+        i = self._where.pop(item)
+        del self._keys[item]
+        last = self._heap.pop()
+        if i < len(self._heap):
+            self._heap[i] = last
+            self._where[last] = i
+            self._down(self._up(i))
+
+    def _up(self, i):
+        heap, keys, where = self._heap, self._keys, self._where
+        item = heap[i]
+        while i > 0:
+            parent = (i - 1) // 2
+            if keys[heap[parent]] <= keys[item]:
+                break
+            heap[i] = heap[parent]
+            where[heap[i]] = i
+            i = parent
+        heap[i] = item
+        where[item] = i
+        return i
+
+    def _down(self, i):
+        heap, keys, where = self._heap, self._keys, self._where
+        item = heap[i]
+        n = len(heap)
+        while True:
+            child = 2 * i + 1
+            if child >= n:
+                break
+            if child + 1 < n and keys[heap[child + 1]] < keys[heap[child]]:
+                child += 1
+            if keys[item] <= keys[heap[child]]:
+                break
+            heap[i] = heap[child]
+            where[heap[i]] = i
+            i = child
+        heap[i] = item
+        where[item] = i
+        return i
+
+
+#One combatant in an encounter, with its own HP so the character it came from isn't changed.
+class Fighter:
+    __slots__ = ("name", "side", "stats", "damage", "HP", "init_roll", "slot")
+
+    def __init__(self, name, side, stats):
+        self.name = name
+        self.side = side
+        self.stats = stats
+        self.damage = dice.compile(stats.damage)
+        self.HP = stats.HP
+        self.init_roll = 0
+        self.slot = 0
+
+    def __repr__(self):
+        return f"Fighter({self.name!r}, side={self.side}, HP={self.HP})"
+
+
+class EncounterResult:
+    def __init__(self, winner, rounds, turns, survivors):
+        #Index of the side still standing (None if the round limit ran out).
+        self.winner = winner
+        self.rounds = rounds
+        self.turns = turns
+        self.survivors = survivors
+
+
+#Alive fighters on each side, with O(1) removal (swap with the last one) and O(1) random picks.
+class _Sides:
+    def __init__(self, count):
+        self.alive = [[] for _ in range(count)]
+        self.standing = 0
+
+    def add(self, fighter):
+        team = self.alive[fighter.side]
+        if not team:
+            self.standing += 1
+        fighter.slot = len(team)
+        team.append(fighter)
+
+    def remove(self, fighter):
+        team = self.alive[fighter.side]
+        last = team.pop()
+        if last is not fighter:
+            team[fighter.slot] = last
+            last.slot = fighter.slot
+        if not team:
+            self.standing -= 1
+
+    #Random living fighter from any side except `side`.
+    def random_enemy(self, side, rng):
+        total = sum(len(team) for s, team in enumerate(self.alive) if s != side)
+        pick = rng.randrange(total)
+        for s, team in enumerate(self.alive):
+            if s == side:
+                continue
+            if pick < len(team):
+                return team[pick]
+            pick -= len(team)
+
+
+#Scalar attack roll with the duel_engine rules. Returns (d20 roll, damage dealt).
+def attack(attacker, defender, rng):
+    roll = rng.randint(1, 20)
+    if roll == 20:
+        return roll, 2 * attacker.damage.roll(rng)
+    if roll == 1 or roll + attacker.stats.atkmod < defender.stats.ac:
+        return roll, 0
+    return roll, attacker.damage.roll(rng)
+
+
+#sides is a list of teams, each a list of (name, character). Side 0 wins initiative ties
+#(the heroes go first on a tie, like in the Semester Project).
+#on_attack(round, attacker, defender, roll, damage) is called after every swing if given.
+def run_encounter(sides, rng=None, max_rounds=1000, on_attack=None):
+    if not isinstance(rng, random.Random):
+        rng = random.Random(rng)
+    queue = InitiativeQueue()
+    teams = _Sides(len(sides))
+    for side, members in enumerate(sides):
+        for name, stats in members:
+            fighter = Fighter(name, side, stats)
+            fighter.init_roll = rng.randint(1, 20) + stats.init
+            teams.add(fighter)
+            queue.push(fighter, (1, -fighter.init_roll, side, rng.random()))
+
+    turns = 0
+    round_no = 1
+    while teams.standing > 1:
+        fighter = queue.peek()
+        round_no = queue.key(fighter)[0]
+        if round_no > max_rounds:
+            break
+        queue.pop()
+        target = teams.random_enemy(fighter.side, rng)
+        roll, damage = attack(fighter, target, rng)
+        target.HP -= damage
+        turns += 1
+        if on_attack is not None:
+            on_attack(round_no, fighter, target, roll, damage)
+        if target.HP <= 0:
+            queue.remove(target)
+            teams.remove(target)
+        queue.push(fighter, (round_no + 1, -fighter.init_roll, fighter.side, rng.random()))
+
+    winner = None
+    if teams.standing == 1:
+        winner = next(s for s, team in enumerate(teams.alive) if team)
+    survivors = [f for team in teams.alive for f in team]
+    return EncounterResult(winner, round_no, turns, survivors)
+
+
+if __name__ == "__main__":
+    from combatants import party, bestiary
+    for horde in (10, 100, 1000, 10_000):
+        heroes = [(f"{name} {i + 1}", stats) for i in range(horde // 10) for name, stats in party.items()]
+        goblins = [(f"Goblin {i + 1}", bestiary["Goblin"]) for i in range(horde)]
+        start = time.perf_counter()
+        result = run_encounter([heroes, goblins], rng=horde)
+        elapsed = time.perf_counter() - start
+        who = {0: "party", 1: "goblins", None: "nobody"}[result.winner]
+        print(f"{len(heroes):>5} heroes vs {horde:>6} goblins: {who} win after {result.rounds} rounds, "
+              f"{len(result.survivors)} left standing ({result.turns:,} turns in {elapsed:.3f}s)")
@@ -0,0 +1,165 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - matchup result cache
+
+#Remembers matchup answers so the same stat lines don't get simulated over and over.
+#The key is both sides' stats (HP, Init, AC, AtkMod, damage dice written the standard way),
+#how the answer was worked out (exact solver, or N simulated duels with a seed) and
+#duel_engine.RULES_VERSION, so a rules change never hands back an old answer.
+#
+#Two levels:
+# - an in-memory LRU (OrderedDict) capped at max_entries, for repeat questions in one session
+# - a sqlite file that survives restarts (optional)
+#stats() says how many answers came from memory, from disk, or had to be worked out.
+
+import json
+import sqlite3
+import time
+from collections import OrderedDict
+
+import dice
+from duel_engine import RULES_VERSION, simulate_duels
+from duel_solver import solve_duel
+from replay import KeyedStream
+
+
+def stat_key(fighter):
+    return (fighter.HP, fighter.init, fighter.ac, fighter.atkmod, str(dice.compile(fighter.damage)))
+
+
+#What gets cached for a matchup.
+class MatchupAnswer:
+    __slots__ = ("hero_win", "villain_win", "rounds")
+
+    def __init__(self, hero_win, villain_win, rounds):
+        self.hero_win = hero_win
+        self.villain_win = villain_win
+        self.rounds = rounds
+
+    def __repr__(self):
+        return f"MatchupAnswer(hero_win={self.hero_win:.6f}, villain_win={self.villain_win:.6f}, rounds={self.rounds:.3f})"
+
+
+def _compute(hero, villain, duels, seed):
+    if duels is None:
+        odds = solve_duel(hero, villain)
+        return MatchupAnswer(odds.hero_win, odds.villain_win, odds.expected_rounds())
+    result = simulate_duels(hero, villain, duels, rng=KeyedStream(seed))
+    return MatchupAnswer(float(result.hero_wins.mean()), float(result.villain_wins.mean()), float(result.rounds.mean()))
+
+
+class MatchupCache:
+    def __init__(self, path=None, max_entries=100_000, commit_every=100):
+        self.max_entries = max_entries
+        self.commit_every = commit_every
+        self._memory = OrderedDict()
+        self._db = None
+        self._pending = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        if path is not None:
+            self._db = sqlite3.connect(path)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS matchups (key TEXT PRIMARY KEY, answer TEXT NOT NULL)")
+            self._db.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self._memory)
+
+    #duels=None asks the exact solver, otherwise it's `duels` simulated duels with `seed`.
+    def matchup(self, hero, villain, duels=None, seed=0):
+        key = (RULES_VERSION, duels, seed if duels is not None else None, stat_key(hero), stat_key(villain))
+        answer = self._memory.get(key)
+        if answer is not None:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return answer
+        answer = self._load(key)
+        if answer is not None:
+            self.disk_hits += 1
+        else:
+            self.misses += 1
+            answer = _compute(hero, villain, duels, seed)
+            self._store(key, answer)
+        self._remember(key, answer)
+        return answer
+
+    def win_rate(self, hero, villain, duels=None, seed=0):
+        return self.matchup(hero, villain, duels, seed).hero_win
+
+    def _remember(self, key, answer):
+        self._memory[key] = answer
+        if len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _load(self, key):
+        if self._db is None:
+            return None
+        row = self._db.execute("SELECT answer FROM matchups WHERE key = ?", (json.dumps(key),)).fetchone()
+        return MatchupAnswer(*json.loads(row[0])) if row else None
+
+    def _store(self, key, answer):
+        if self._db is None:
+            return
+        self._db.execute("INSERT OR REPLACE INTO matchups VALUES (?, ?)",
+                         (json.dumps(key), json.dumps([answer.hero_win, answer.villain_win, answer.rounds])))
+        self._pending += 1
+        if self._pending >= self.commit_every:
+            self.flush()
+
+    def flush(self):
+        if self._db is not None and self._pending:
+            self._db.commit()
+            self._pending = 0
+
+    def close(self):
+        if self._db is not None:
+            self.flush()
+            self._db.close()
+            self._db = None
+
+    def stats(self):
+        total = self.memory_hits + self.disk_hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": (self.memory_hits + self.disk_hits) / total if total else 0.0,
+            "entries": len(self._memory),
+        }
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from combatants import party, bestiary
+
+    pairs = [(h, v) for h in party.values() for v in bestiary.values()]
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "matchups.sqlite")
+        with MatchupCache(path) as cache:
+            start = time.perf_counter()
+            for hero, villain in pairs:
+                cache.matchup(hero, villain, duels=100_000)
+            print(f"First pass (simulated): {(time.perf_counter() - start) / len(pairs) * 1e3:.2f} ms per matchup")
+            start = time.perf_counter()
+            for _ in range(1000):
+                for hero, villain in pairs:
+                    cache.matchup(hero, villain, duels=100_000)
+            print(f"Repeats (memory):       {(time.perf_counter() - start) / (1000 * len(pairs)) * 1e6:.2f} us per matchup")
+            print(cache.stats())
+
+        #A new session: nothing in memory, everything on disk.
+        with MatchupCache(path) as cache:
+            start = time.perf_counter()
+            for hero, villain in pairs:
+                cache.matchup(hero, villain, duels=100_000)
+            print(f"After restart (disk):   {(time.perf_counter() - start) / len(pairs) * 1e6:.2f} us per matchup")
+            print(cache.stats())
@@ -0,0 +1,96 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - matchup matrix
+
+#Fights every hero against every enemy with the batch duel engine and fills in a win rate table.
+#The cells are spread over a process pool. Each cell gets its own random stream built from the seed
+#and the two names, so the table comes out exactly the same no matter how many workers run it
+#(or what order they finish in).
+
+import argparse
+import os
+import time
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from duel_engine import simulate_duels
+
+
+class MatchupMatrix:
+    def __init__(self, heroes, villains, win_rates, rounds, cell_seconds, duels, wall_seconds):
+        self.heroes = heroes
+        self.villains = villains
+        #win_rates[i, j] is how often heroes[i] beats villains[j].
+        self.win_rates = win_rates
+        self.rounds = rounds
+        self.cell_seconds = cell_seconds
+        #duels[i, j] is how many duels cell (i, j) took.
+        self.duels = duels
+        self.wall_seconds = wall_seconds
+
+    def throughput(self):
+        return self.duels.sum() / self.wall_seconds
+
+    def __str__(self):
+        width = max(len(name) for name in self.heroes)
+        lines = [" " * width + "".join(f"{name:>12}" for name in self.villains)]
+        for i, hero in enumerate(self.heroes):
+            lines.append(f"{hero:>{width}}" + "".join(f"{rate:>12.2%}" for rate in self.win_rates[i]))
+        return "\n".join(lines)
+
+
+#Random stream for one cell. crc32 keeps it stable between runs (hash() is salted per process).
+def cell_seed(seed, hero_name, villain_name):
+    key = (zlib.crc32(hero_name.encode()), zlib.crc32(villain_name.encode()))
+    return np.random.SeedSequence(seed, spawn_key=key)
+
+
+def _run_cell(job):
+    hero, villain, duels, seq = job
+    start = time.perf_counter()
+    result = simulate_duels(hero, villain, duels, rng=np.random.default_rng(seq))
+    return result.win_rate(), float(result.rounds.mean()), time.perf_counter() - start
+
+
+#heroes and villains are {name: character} dicts.
+def run_matrix(heroes, villains, duels=100_000, seed=0, workers=None):
+    hero_names = list(heroes)
+    villain_names = list(villains)
+    jobs = [
+        (heroes[h], villains[v], duels, cell_seed(seed, h, v))
+        for h in hero_names
+        for v in villain_names
+    ]
+    start = time.perf_counter()
+    if workers == 1:
+        results = [_run_cell(job) for job in jobs]
+    else:
+        workers = workers or os.cpu_count()
+        chunk = max(1, len(jobs) // (4 * workers))
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_cell, jobs, chunksize=chunk))
+    wall = time.perf_counter() - start
+
+    shape = (len(hero_names), len(villain_names))
+    win_rates, rounds, seconds = (np.array(col).reshape(shape) for col in zip(*results))
+    return MatchupMatrix(hero_names, villain_names, win_rates, rounds, seconds, np.full(shape, duels), wall)
+
+
+if __name__ == "__main__":
+    from combatants import party, bestiary
+    parser = argparse.ArgumentParser(description="Party vs bestiary win rate table")
+    parser.add_argument("--duels", type=int, default=100_000, help="duels per matchup")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=None, help="processes (default: all cores)")
+    args = parser.parse_args()
+
+    matrix = run_matrix(party, bestiary, args.duels, args.seed, args.workers)
+    print(matrix)
+    print()
+    print("Seconds per cell:")
+    for i, hero in enumerate(matrix.heroes):
+        print(f"{hero:>11} " + " ".join(f"{s:7.3f}" for s in matrix.cell_seconds[i]))
+    print(f"{matrix.duels.sum():,} duels in {matrix.wall_seconds:.2f}s "
+          f"({matrix.throughput():,.0f} duels/s)")
@@ -0,0 +1,314 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - matchup query server
+
+#A long running local service that answers matchup questions, so tools don't each start Python,
+#import numpy and run a script. It only listens on 127.0.0.1 (or a Unix socket).
+#
+#Protocol: one JSON object per line each way.
+#   {"id": 1, "hero": "Gale", "villain": "Orc", "duels": 100000, "seed": 7}
+#   {"id": 1, "hero_win": 0.91, "villain_win": 0.09, "rounds": 4.2}
+#hero/villain is a name from party.csv or bestiary.csv, or a stat dict like
+#{"HP": 30, "Init": 1, "AC": 14, "AtkMod": 5, "Damage": "1d8+3"}. Leave out "duels" for the
+#exact solver's answer. {"op": "stats"} returns the server's counters.
+#Limits (anything over gets an error line back instead of tying up a worker): duels up to
+#MAX_DUELS, HP 1 to MAX_HP, Init/AC/AtkMod within +-MAX_STAT, and damage that can't roll more
+#than MAX_DAMAGE.
+#
+#Questions that show up within `window` seconds of each other get answered together: every
+#simulated one goes into a single duel_engine.simulate_matchups call, and the whole batch runs
+#in a worker process so the event loop keeps taking requests. Each matchup still gets exactly the
+#fights KeyedStream(seed) would give it alone, so the answer doesn't depend on what else was in
+#the batch. The same question asked twice while the first is still running is only worked out once.
+
+import argparse
+import asyncio
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import dice
+from combatants import character
+from matchup_cache import stat_key
+
+HOST = "127.0.0.1"
+#Simulated fights per worker job. Bigger batches get split so they can use more than one core.
+MAX_BATCH_FIGHTS = 2_000_000
+#Biggest single question, so one question is never more than one worker job.
+MAX_DUELS = MAX_BATCH_FIGHTS
+MAX_HP = 10_000
+MAX_STAT = 1_000
+MAX_DAMAGE = 10_000
+
+
+def _fighter(stats):
+    return character(*stats)
+
+
+#Runs in a worker. jobs are (hero stats, villain stats, duels, seed), answers come back in order:
+#(hero_win, villain_win, rounds), or {"error": message} for a job that couldn't be worked out, so
+#one bad question doesn't take the rest of its batch down with it.
+def _solve_batch(jobs):
+    from duel_engine import simulate_matchups
+    from duel_solver import solve_duel
+    from replay import MultiKeyedStream
+
+    def simulate(indexes):
+        pairs = [(_fighter(jobs[i][0]), _fighter(jobs[i][1])) for i in indexes]
+        counts = [jobs[i][2] for i in indexes]
+        stream = MultiKeyedStream([jobs[i][3] for i in indexes], counts)
+        for i, result in zip(indexes, simulate_matchups(pairs, counts, rng=stream)):
+            answers[i] = (float(result.hero_wins.mean()), float(result.villain_wins.mean()),
+                          float(result.rounds.mean()))
+
+    answers = [None] * len(jobs)
+    simulated = []
+    for i, (hero, villain, duels, seed) in enumerate(jobs):
+        if duels is not None:
+            simulated.append(i)
+            continue
+        try:
+            odds = solve_duel(_fighter(hero), _fighter(villain))
+            answers[i] = (odds.hero_win, odds.villain_win, odds.expected_rounds())
+        except Exception as error:
+            answers[i] = {"error": f"{type(error).__name__}: {error}"}
+    if simulated:
+        try:
+            simulate(simulated)
+        except Exception:
+            #Something in the batch is bad: run them one at a time to find out which.
+            for i in simulated:
+                try:
+                    simulate([i])
+                except Exception as error:
+                    answers[i] = {"error": f"{type(error).__name__}: {error}"}
+    return answers
+
+
+#Splits a batch into worker jobs of about MAX_BATCH_FIGHTS fights each (exact ones count as 1).
+def _split(batch, limit=MAX_BATCH_FIGHTS):
+    parts = [[]]
+    fights = 0
+    for query in batch:
+        size = query[2] or 1
+        if parts[-1] and fights + size > limit:
+            parts.append([])
+            fights = 0
+        parts[-1].append(query)
+        fights += size
+    return parts
+
+
+class MatchupServer:
+    def __init__(self, workers=None, window=0.002, max_batch=256):
+        from combatants import party, bestiary
+        self.names = {**bestiary, **party}
+        self.window = window
+        self.max_batch = max_batch
+        self.workers = workers or os.cpu_count()
+        self._pool = None
+        self._pending = []
+        self._timer = None
+        self._in_flight = {}
+        self.queries = 0
+        self.deduped = 0
+        self.batches = 0
+        self.jobs = 0
+
+    def _stats(self, value):
+        if isinstance(value, str):
+            if value not in self.names:
+                raise ValueError(f"unknown fighter {value!r}")
+            return stat_key(self.names[value])
+        fighter = character(int(value["HP"]), int(value["Init"]), int(value["AC"]),
+                            int(value["AtkMod"]), str(value["Damage"]))
+        if not 1 <= fighter.HP <= MAX_HP:
+            raise ValueError(f"HP must be between 1 and {MAX_HP}, got {fighter.HP}")
+        for name in ("init", "ac", "atkmod"):
+            if abs(getattr(fighter, name)) > MAX_STAT:
+                raise ValueError(f"{name} must be between -{MAX_STAT} and {MAX_STAT}")
+        #Raises ValueError for anything that isn't a dice expression.
+        if dice.compile(fighter.damage).max() > MAX_DAMAGE:
+            raise ValueError(f"damage can't go over {MAX_DAMAGE}")
+        return stat_key(fighter)
+
+    #(hero_win, villain_win, rounds) for one question.
+    async def query(self, hero, villain, duels=None, seed=0):
+        if duels is not None and not 1 <= int(duels) <= MAX_DUELS:
+            raise ValueError(f"duels must be between 1 and {MAX_DUELS}")
+        job = (self._stats(hero), self._stats(villain),
+               None if duels is None else int(duels), 0 if duels is None else int(seed))
+        self.queries += 1
+        future = self._in_flight.get(job)
+        if future is not None:
+            self.deduped += 1
+            return await asyncio.shield(future)
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[job] = future
+        self._pending.append(job)
+        if len(self._pending) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = asyncio.get_running_loop().call_later(self.window, self._flush)
+        return await asyncio.shield(future)
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batches += 1
+            for part in _split(batch):
+                asyncio.ensure_future(self._run(part))
+
+    async def _run(self, jobs):
+        self.jobs += 1
+        try:
+            answers = await asyncio.get_running_loop().run_in_executor(self._pool, _solve_batch, jobs)
+        except Exception as error:
+            for job in jobs:
+                future = self._in_flight.pop(job)
+                if not future.done():
+                    future.set_exception(error)
+            return
+        for job, answer in zip(jobs, answers):
+            future = self._in_flight.pop(job)
+            if isinstance(answer, dict):
+                future.set_exception(ValueError(answer["error"]))
+            else:
+                future.set_result(answer)
+
+    def stats(self):
+        return {"queries": self.queries, "deduped": self.deduped, "batches": self.batches,
+                "jobs": self.jobs, "in_flight": len(self._in_flight)}
+
+    async def _answer(self, request):
+        if request.get("op") == "stats":
+            return {"id": request.get("id"), **self.stats()}
+        try:
+            hero_win, villain_win, rounds = await self.query(request["hero"], request["villain"],
+                                                             request.get("duels"), request.get("seed", 0))
+        except (KeyError, TypeError, ValueError) as error:
+            return {"id": request.get("id"), "error": str(error)}
+        return {"id": request.get("id"), "hero_win": hero_win, "villain_win": villain_win, "rounds": rounds}
+
+    async def _connection(self, reader, writer):
+        lock = asyncio.Lock()
+        tasks = set()
+
+        async def reply(request):
+            try:
+                response = await self._answer(request)
+            except Exception as error:
+                #Whatever went wrong, the client still gets a line back for this id.
+                response = {"id": request.get("id"), "error": f"{type(error).__name__}: {error}"}
+            async with lock:
+                writer.write((json.dumps(response) + "\n").encode())
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                try:
+                    request = json.loads(line)
+                except ValueError:
+                    request = None
+                if not isinstance(request, dict):
+                    async with lock:
+                        writer.write(b'{"error": "expected one JSON object per line"}\n')
+                    continue
+                #Every request gets its own task so one connection can have many in flight.
+                task = asyncio.ensure_future(reply(request))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def start(self, port=0, unix=None):
+        self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        #Start the workers now so the first question doesn't pay for it.
+        await asyncio.gather(*[asyncio.get_running_loop().run_in_executor(self._pool, _solve_batch, [])
+                               for _ in range(self.workers)])
+        if unix:
+            return await asyncio.start_unix_server(self._connection, path=unix)
+        return await asyncio.start_server(self._connection, HOST, port)
+
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
+
+
+#Sends a list of requests over one connection and returns the responses in the same order.
+async def ask(requests, port=None, unix=None):
+    if unix:
+        reader, writer = await asyncio.open_unix_connection(unix)
+    else:
+        reader, writer = await asyncio.open_connection(HOST, port)
+    for i, request in enumerate(requests):
+        writer.write((json.dumps({**request, "id": i}) + "\n").encode())
+    await writer.drain()
+    responses = [None] * len(requests)
+    for _ in requests:
+        response = json.loads(await reader.readline())
+        responses[response["id"]] = response
+    writer.close()
+    await writer.wait_closed()
+    return responses
+
+
+async def _demo(server, port=None, unix=None):
+    from combatants import party, bestiary
+    questions = [{"hero": h, "villain": v, "duels": 200_000, "seed": 1} for h in party for v in bestiary]
+    questions += [{"hero": h, "villain": v} for h in party for v in bestiary]
+    #Eight tools asking overlapping questions at the same time.
+    start = time.perf_counter()
+    answers = await asyncio.gather(*[ask(questions[i::2] + questions[:10], port, unix) for i in range(8)])
+    elapsed = time.perf_counter() - start
+    total = sum(len(a) for a in answers)
+    print(f"{total} questions from 8 clients answered in {elapsed:.2f}s")
+    print("Server:", server.stats())
+    gale = next(a for a in answers[0] if "hero_win" in a)
+    print("First answer:", gale)
+    print("Stats request:", (await ask([{"op": "stats"}], port, unix))[0])
+
+
+async def _main(args):
+    server = MatchupServer(args.workers, args.window, args.max_batch)
+    listener = await server.start(args.port, args.unix)
+    where = args.unix or "%s:%d" % listener.sockets[0].getsockname()[:2]
+    print(f"Matchup server on {where} with {server.workers} workers")
+    try:
+        if args.demo:
+            port = None if args.unix else listener.sockets[0].getsockname()[1]
+            await _demo(server, port, args.unix)
+        else:
+            async with listener:
+                await listener.serve_forever()
+    finally:
+        listener.close()
+        server.close()
+        if args.unix and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Local matchup query server (JSON lines)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--unix", help="listen on this Unix socket path instead of TCP")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--window", type=float, default=0.002, help="seconds to collect a batch")
+    parser.add_argument("--max-batch", type=int, default=256)
+    parser.add_argument("--demo", action="store_true", help="start on a free port, run some clients, exit")
+    args = parser.parse_args()
+    if args.demo and not args.unix:
+        args.port = 0
+    try:
+        asyncio.run(_main(args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,171 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - seeded replays
+
+#Makes every simulated duel reproducible on its own. KeyedStream doesn't hand out random numbers
+#in order like random/numpy do. Each number is a hash of (seed, fight number, round, which draw),
+#so fight 734,211 out of a batch of millions can be replayed by itself without fighting the
+#734,210 fights before it. A fight is fully described by its seed and fight number.
+#
+#Replay file (.rply), little endian:
+#   magic "RPLY", uint16 file version, uint16 duel_engine.RULES_VERSION
+#   uint64 seed, uint64 first fight, uint64 fight count, uint32 max rounds
+#   hero and villain: int32 HP, init, AC, AtkMod, uint16 length + utf-8 damage dice
+#   uint32 flag count, then that many uint64 fight numbers worth looking at
+
+import struct
+import time
+
+import numpy as np
+
+import dice
+from duel_engine import MAX_ROUNDS, RULES_VERSION, simulate_duels
+
+MAGIC = b"RPLY"
+VERSION = 1
+_HEADER = struct.Struct("<4sHHQQQI")
+_STATS = struct.Struct("<iiiiH")
+_COUNT = struct.Struct("<I")
+
+_GOLDEN = np.uint64(0x9E3779B97F4A7C15)
+_DRAW_STEP = np.uint64(0xD1B54A32D192ED03)
+
+
+#splitmix64 finalizer, works on whole uint64 arrays.
+def _mix(z):
+    z = (z ^ (z >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    z = (z ^ (z >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return z ^ (z >> np.uint64(31))
+
+
+def _fight_base(keys, fights):
+    with np.errstate(over="ignore"):
+        return _mix(fights * _GOLDEN ^ keys)
+
+
+def _keyed_bits(base, round_no, slot):
+    with np.errstate(over="ignore"):
+        return _mix(base + np.uint64(round_no * 8 + slot) * _DRAW_STEP)
+
+
+def _seed_key(seed):
+    return _mix(np.array([int(seed) & 0xFFFFFFFFFFFFFFFF], dtype=np.uint64))[0]
+
+
+#Turns the 64 random bits for a draw into what duel_engine asks for.
+class _BitsStream:
+    def uniform(self, fights, round_no, slot):
+        return (self.bits(fights, round_no, slot) >> np.uint64(11)) * (1.0 / (1 << 53))
+
+    def d20(self, fights, round_no, slot):
+        return ((self.bits(fights, round_no, slot) >> np.uint64(32)) * np.uint64(20) >> np.uint64(32)).astype(np.int64) + 1
+
+    def damage(self, dmg, fights, round_no, slot):
+        return dmg.quantile(self.uniform(fights, round_no, slot))
+
+
+#Random source for duel_engine.simulate_duels where every draw depends only on its position.
+class KeyedStream(_BitsStream):
+    def __init__(self, seed):
+        self.seed = int(seed) & 0xFFFFFFFFFFFFFFFF
+        self._key = _seed_key(self.seed)
+
+    def bits(self, fights, round_no, slot):
+        return _keyed_bits(_fight_base(self._key, np.asarray(fights, dtype=np.uint64)), round_no, slot)
+
+
+#For duel_engine.simulate_matchups: pair j has its own seed and counts[j] fights, and gets exactly
+#the draws KeyedStream(seeds[j]) would give it, so a batched answer matches a one-off one.
+class MultiKeyedStream(_BitsStream):
+    def __init__(self, seeds, counts):
+        keys = np.array([_seed_key(seed) for seed in seeds], dtype=np.uint64)
+        local = np.concatenate([np.arange(count, dtype=np.uint64) for count in counts] or [np.zeros(0, np.uint64)])
+        #The per-fight half of the hash only has to be worked out once for the whole batch.
+        self._base = _fight_base(np.repeat(keys, counts), local)
+
+    def bits(self, fights, round_no, slot):
+        return _keyed_bits(self._base[fights], round_no, slot)
+
+
+class Replay:
+    def __init__(self, hero, villain, seed, fights, first_fight=0, max_rounds=MAX_ROUNDS, flagged=()):
+        self.hero = hero
+        self.villain = villain
+        self.seed = seed
+        self.fights = fights
+        self.first_fight = first_fight
+        self.max_rounds = max_rounds
+        self.flagged = list(flagged)
+
+    #The whole batch (or any slice of it), exactly as it was first simulated.
+    def run(self, start=None, count=None, log=None):
+        start = self.first_fight if start is None else start
+        count = self.first_fight + self.fights - start if count is None else count
+        return simulate_duels(self.hero, self.villain, count, rng=KeyedStream(self.seed),
+                              max_rounds=self.max_rounds, log=log, first_fight=start)
+
+    #Just one fight. Pass an EventSink as log to get it swing by swing.
+    def fight(self, number, log=None):
+        if not self.first_fight <= number < self.first_fight + self.fights:
+            raise IndexError(f"fight {number} is not in this replay")
+        return self.run(number, 1, log)
+
+    def save(self, path):
+        with open(path, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, RULES_VERSION, self.seed, self.first_fight,
+                                 self.fights, self.max_rounds))
+            for who in (self.hero, self.villain):
+                damage = str(dice.compile(who.damage)).encode()
+                f.write(_STATS.pack(who.HP, who.init, who.ac, who.atkmod, len(damage)))
+                f.write(damage)
+            f.write(_COUNT.pack(len(self.flagged)))
+            f.write(np.asarray(self.flagged, dtype="<u8").tobytes())
+
+
+def load_replay(path):
+    from combatants import character
+    with open(path, "rb") as f:
+        magic, version, rules, seed, first, fights, max_rounds = _HEADER.unpack(f.read(_HEADER.size))
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} replay file")
+        if rules != RULES_VERSION:
+            raise ValueError(f"{path} was recorded with rules version {rules}, "
+                             f"these are version {RULES_VERSION}")
+        sides = []
+        for _ in range(2):
+            hp, init, ac, atkmod, size = _STATS.unpack(f.read(_STATS.size))
+            sides.append(character(hp, init, ac, atkmod, f.read(size).decode()))
+        (count,) = _COUNT.unpack(f.read(_COUNT.size))
+        flagged = np.frombuffer(f.read(8 * count), dtype="<u8").tolist()
+    return Replay(sides[0], sides[1], seed, fights, first, max_rounds, flagged)
+
+
+if __name__ == "__main__":
+    import os
+    import tempfile
+    from combatants import party, bestiary
+    from combat_log import EventSink, render
+
+    replay = Replay(party["Astarion"], bestiary["Goblin"], seed=2025, fights=2_000_000)
+    start = time.perf_counter()
+    result = replay.run()
+    print(f"{replay.fights:,} duels in {time.perf_counter() - start:.2f}s, "
+          f"Astarion wins {result.win_rate():.4%}")
+    replay.flagged = (np.flatnonzero(result.villain_wins) + result.first_fight).tolist()
+    print(f"Astarion lost {len(replay.flagged)} times, fights {replay.flagged[:5]}")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = os.path.join(folder, "goblin.rply")
+        replay.save(path)
+        print(f"Replay file is {os.path.getsize(path)} bytes")
+        loaded = load_replay(path)
+        number = loaded.flagged[-1]
+        start = time.perf_counter()
+        log_path = os.path.join(folder, "fight.clog")
+        with EventSink(log_path) as sink:
+            again = loaded.fight(number, log=sink)
+        print(f"Replayed fight {number} alone in {(time.perf_counter() - start) * 1000:.1f} ms:")
+        for line in render(log_path):
+            print("  " + line)
+        same = again.villain_wins[0] and again.rounds[0] == result.rounds[number]
+        print("Same result as the batch:", bool(same))
@@ -0,0 +1,235 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - compact roster
+
+#A roster of a lot of combatants without a Python object for each one. HP, Init, AC and AtkMod
+#are numpy arrays (int16 when the numbers fit, which is always for normal stats, and widened to
+#int32/int64 the moment something bigger gets written), damage is a small code into a list of
+#distinct dice. A million goblins is about 10 MB this way instead of
+#80 MB of character objects (and that's with __slots__).
+#
+#roster[i] gives a view that acts like a combatants.character (view.HP, view.ac, view.damage ...,
+#reading and writing), so code written for one character still works on a roster entry. The
+#point of the roster is the bulk operations though: apply_damage() for a whole array of hits at
+#once, and compact() to drop the dead.
+
+import time
+
+import numpy as np
+
+import dice
+from combatants import character
+
+_SIGNED = (np.int16, np.int32, np.int64)
+_UNSIGNED = (np.uint16, np.uint32, np.uint64)
+
+
+#Smallest of `types` that holds every number from low to high.
+def _fitting(types, low, high):
+    for kind in types:
+        info = np.iinfo(kind)
+        if info.min <= low and high <= info.max:
+            return kind
+    raise OverflowError(f"{low} to {high} doesn't fit in 64 bits")
+
+
+def _column(values):
+    array = np.asarray(values, dtype=np.int64)
+    if not array.size:
+        return array.astype(np.int16)
+    return array.astype(_fitting(_SIGNED, int(array.min()), int(array.max())))
+
+
+#Acts like a character but reads and writes row `index` of a Roster.
+#Views hold a row number, so they point at a different combatant after compact().
+class CharacterView:
+    __slots__ = ("roster", "index")
+
+    def __init__(self, roster, index):
+        self.roster = roster
+        self.index = index
+
+    @property
+    def HP(self):
+        return int(self.roster.hp[self.index])
+
+    @HP.setter
+    def HP(self, value):
+        self.roster._set("hp", self.index, value)
+
+    @property
+    def init(self):
+        return int(self.roster.init[self.index])
+
+    @init.setter
+    def init(self, value):
+        self.roster._set("init", self.index, value)
+
+    @property
+    def ac(self):
+        return int(self.roster.ac[self.index])
+
+    @ac.setter
+    def ac(self, value):
+        self.roster._set("ac", self.index, value)
+
+    @property
+    def atkmod(self):
+        return int(self.roster.atkmod[self.index])
+
+    @atkmod.setter
+    def atkmod(self, value):
+        self.roster._set("atkmod", self.index, value)
+
+    @property
+    def damage(self):
+        return self.roster.dice[self.roster.damage_codes[self.index]]
+
+    @damage.setter
+    def damage(self, value):
+        self.roster._set("damage_codes", self.index, self.roster.dice_code(value))
+
+    def __repr__(self):
+        return f"character({self.HP}, {self.init}, {self.ac}, {self.atkmod}, {self.damage!r})"
+
+
+class Roster:
+    def __init__(self, hp, init, ac, atkmod, damage_codes, dice_list):
+        self.hp = _column(hp)
+        self.init = _column(init)
+        self.ac = _column(ac)
+        self.atkmod = _column(atkmod)
+        self.dice = [str(dice.compile(d)) for d in dice_list]
+        self._codes = {expr: i for i, expr in enumerate(self.dice)}
+        self.damage_codes = np.asarray(damage_codes, dtype=np.uint16)
+        if len({self.hp.size, self.init.size, self.ac.size, self.atkmod.size, self.damage_codes.size}) != 1:
+            raise ValueError("every stat column needs the same length")
+
+    @classmethod
+    def from_characters(cls, fighters):
+        fighters = list(fighters)
+        dice_list = list(dict.fromkeys(str(dice.compile(f.damage)) for f in fighters))
+        codes = {expr: i for i, expr in enumerate(dice_list)}
+        return cls([f.HP for f in fighters], [f.init for f in fighters], [f.ac for f in fighters],
+                   [f.atkmod for f in fighters], [codes[str(dice.compile(f.damage))] for f in fighters], dice_list)
+
+    #n copies of one character (a million goblins).
+    @classmethod
+    def repeat(cls, fighter, n):
+        return cls(np.full(n, fighter.HP), np.full(n, fighter.init), np.full(n, fighter.ac),
+                   np.full(n, fighter.atkmod), np.zeros(n), [fighter.damage])
+
+    #Straight from a bestiary.Bestiary's columns, without building a character for each row.
+    @classmethod
+    def from_bestiary(cls, beasts):
+        return cls(beasts.hp, beasts.init, beasts.ac, beasts.atkmod, beasts.damage_codes, beasts.dice)
+
+    def dice_code(self, damage):
+        expr = str(dice.compile(damage))
+        if expr not in self._codes:
+            self._codes[expr] = len(self.dice)
+            self.dice.append(expr)
+        return self._codes[expr]
+
+    def __len__(self):
+        return self.hp.size
+
+    #Writes values into row(s) `index` of a stat column, first widening the column (int16 ->
+    #int32 -> int64, uint16 -> uint32 for damage codes) if they don't fit, like a character's
+    #attributes would take any int.
+    def _set(self, stat, index, values):
+        column = getattr(self, stat)
+        values = np.asarray(values, dtype=np.int64)
+        if values.size:
+            types = _UNSIGNED if column.dtype.kind == "u" else _SIGNED
+            kind = np.dtype(_fitting(types, int(values.min()), int(values.max())))
+            if kind.itemsize > column.dtype.itemsize:
+                column = column.astype(kind)
+                setattr(self, stat, column)
+        column[index] = values
+
+    def __getitem__(self, index):
+        if not -len(self) <= index < len(self):
+            raise IndexError("roster index out of range")
+        return CharacterView(self, index % len(self))
+
+    def __iter__(self):
+        return (CharacterView(self, i) for i in range(len(self)))
+
+    #A real (separate) character for row i.
+    def character(self, index):
+        view = self[index]
+        return character(view.HP, view.init, view.ac, view.atkmod, view.damage)
+
+    def nbytes(self):
+        return sum(getattr(self, stat).nbytes for stat in ("hp", "init", "ac", "atkmod", "damage_codes"))
+
+    def alive(self):
+        return self.hp > 0
+
+    #Subtracts damage from HP: either one amount per combatant, or amounts for the rows in `index`
+    #(the same row can show up more than once and every hit counts). Negative damage heals. The
+    #HP column gets wider if the new HP doesn't fit, so it never wraps around. Returns the rows
+    #that went from alive to dead.
+    def apply_damage(self, damage, index=None):
+        if index is None:
+            old = self.hp.astype(np.int64)
+            new = old - np.asarray(damage, dtype=np.int64)
+            self._set("hp", slice(None), new)
+            return np.flatnonzero((old > 0) & (new <= 0))
+        hit, inverse = np.unique(np.asarray(index), return_inverse=True)
+        total = np.bincount(inverse, weights=damage, minlength=hit.size).astype(np.int64)
+        old = self.hp[hit].astype(np.int64)
+        new = old - total
+        self._set("hp", hit, new)
+        return hit[(old > 0) & (new <= 0)]
+
+    #Drops everyone at 0 HP or less. Returns the old row numbers of the ones kept, in order.
+    def compact(self):
+        keep = np.flatnonzero(self.hp > 0)
+        for stat in ("hp", "init", "ac", "atkmod", "damage_codes"):
+            setattr(self, stat, getattr(self, stat)[keep])
+        return keep
+
+
+if __name__ == "__main__":
+    import tracemalloc
+    from combatants import party, bestiary
+
+    #Healing past what int16 holds widens the column instead of wrapping (both ways of applying
+    #damage), and so does setting a stat through a view, the same as on a real character.
+    tank = Roster.repeat(character(30000, 1, 10, 2, "1d4"), 3)
+    assert tank.apply_damage([-5000, 0, 0]).size == 0 and tank.hp.tolist() == [35000, 30000, 30000]
+    assert tank.apply_damage([-5000, 10], [1, 1]).size == 0 and tank.hp.tolist() == [35000, 34990, 30000]
+    assert tank.apply_damage([40000], [2]).tolist() == [2] and tank[2].HP == -10000
+    tank[0].HP = 40000
+    tank[1].ac = 70000
+    assert tank[0].HP == 40000 and tank[1].ac == 70000 and tank.ac.dtype == np.int32
+    print("Big heals and big stats widen the columns:", tank.hp.dtype, tank.ac.dtype)
+
+    n = 1_000_000
+    goblin = bestiary["Goblin"]
+    tracemalloc.start()
+    objects = [character(goblin.HP, goblin.init, goblin.ac, goblin.atkmod, goblin.damage) for _ in range(n)]
+    object_bytes = tracemalloc.get_traced_memory()[0]
+    del objects
+    tracemalloc.stop()
+    siege = Roster.repeat(goblin, n)
+    print(f"{n:,} goblins: {object_bytes / 1e6:.0f} MB as character objects, {siege.nbytes() / 1e6:.0f} MB as a roster")
+    print("Goblin #12 looks like", siege[12])
+
+    #The party carves through the horde: every round each hero hits a random goblin 200,000 times.
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    rounds = 0
+    while len(siege):
+        rounds += 1
+        for hero in party.values():
+            swings = min(200_000, len(siege))
+            targets = rng.integers(0, len(siege), swings)
+            rolls = rng.integers(1, 21, swings)
+            hit = (rolls == 20) | ((rolls != 1) & (rolls + hero.atkmod >= siege.ac[targets]))
+            damage = dice.roll(hero.damage, rng, int(hit.sum())) * np.where(rolls[hit] == 20, 2, 1)
+            siege.apply_damage(damage, targets[hit])
+        siege.compact()
+    print(f"Horde wiped out in {rounds} rounds, {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,259 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Rock paper scissors engine
+
+#HW17 works out who won with a chain of elifs. Here it's a 3x3 table instead: OUTCOMES[a][b] is
+#1 if move a beats move b, -1 if it loses and 0 for a draw, so a whole array of rounds is one
+#numpy lookup. Moves are 0 rock, 1 paper, 2 scissors (HW17's 1/2/3 minus one).
+#Bots play lots of matches side by side: every call to move() gives one move for each match, so a
+#round of 10,000 matches costs about the same as a round of one. A bot is a class with
+#   start(matches, rng)   forget everything, get ready for `matches` separate matches
+#   move()                this round's move in every match
+#   see(mine, theirs)     what both sides just played
+#Bots whose moves don't depend on the game so far (RandomBot) can also hand over a whole block of
+#rounds at once with moves(rounds), and two of those skip the round-by-round loop completely.
+#round_robin() plays every bot against every other one, spread over a process pool if asked.
+#Only numpy needs installing, and only for the batch parts (outcome() is plain Python).
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+ROCK, PAPER, SCISSORS = 0, 1, 2
+NAMES = ("rock", "paper", "scissors")
+OUTCOMES = ((0, -1, 1),
+            (1, 0, -1),
+            (-1, 1, 0))
+#Elements per block when two RandomBots play (one byte each, per side).
+BLOCK = 1 << 22
+
+
+#One round: 1 if a beats b, -1 if b beats a, 0 for a draw.
+def outcome(a, b):
+    return OUTCOMES[a][b]
+
+
+#Same for whole arrays of moves.
+def outcomes(a, b):
+    import numpy as np
+    return np.asarray(OUTCOMES, dtype=np.int8)[a, b]
+
+
+#The move that beats each move.
+def counter(moves):
+    return (moves + 1) % 3
+
+
+#Picks the biggest count in each row, breaking ties at random. Counts differ by at least 1, so
+#counts * 3 plus a random 0-2 never changes which one is bigger, it only splits ties.
+def _argmax(counts, rng):
+    return (counts * 3 + rng.integers(0, 3, size=counts.shape)).argmax(axis=-1)
+
+
+class RandomBot:
+    name = "random"
+
+    def start(self, matches, rng):
+        self.matches = matches
+        self.rng = rng
+
+    def move(self):
+        return self.moves(1)[0]
+
+    #`rounds` rounds at once, shape (rounds, matches).
+    def moves(self, rounds):
+        import numpy as np
+        return self.rng.integers(0, 3, size=(rounds, self.matches), dtype=np.int8)
+
+    def see(self, mine, theirs):
+        pass
+
+
+#Plays whatever beats the opponent's most common move so far.
+class FrequencyBot:
+    name = "frequency"
+
+    def start(self, matches, rng):
+        import numpy as np
+        self.rng = rng
+        self.rows = np.arange(matches)
+        self.counts = np.zeros((matches, 3), dtype=np.int64)
+
+    def move(self):
+        return counter(_argmax(self.counts, self.rng))
+
+    def see(self, mine, theirs):
+        self.counts[self.rows, theirs] += 1
+
+
+#Keeps count of what the opponent played after each of their moves (a first-order Markov chain)
+#and plays whatever beats their most likely next move.
+class MarkovBot:
+    name = "markov"
+
+    def start(self, matches, rng):
+        import numpy as np
+        self.rng = rng
+        self.rows = np.arange(matches)
+        #transitions[m, last, next] = times the opponent in match m played next right after last.
+        self.transitions = np.zeros((matches, 3, 3), dtype=np.int64)
+        self.last = None
+
+    def move(self):
+        if self.last is None:
+            return self.rng.integers(0, 3, size=len(self.rows))
+        return counter(_argmax(self.transitions[self.rows, self.last], self.rng))
+
+    def see(self, mine, theirs):
+        if self.last is not None:
+            self.transitions[self.rows, self.last, theirs] += 1
+        self.last = theirs
+
+
+BOTS = {bot.name: bot for bot in (RandomBot, FrequencyBot, MarkovBot)}
+
+
+class MatchResult:
+    def __init__(self, wins, losses, draws, rounds):
+        #Per match, from the first bot's side.
+        self.wins = wins
+        self.losses = losses
+        self.draws = draws
+        self.rounds = rounds
+
+    def __len__(self):
+        return len(self.wins)
+
+    def win_rate(self):
+        return float(self.wins.sum() / (len(self) * self.rounds))
+
+    def loss_rate(self):
+        return float(self.losses.sum() / (len(self) * self.rounds))
+
+    #Points per round, a win is 1 and a draw is 1/2.
+    def score(self):
+        return float((self.wins.sum() + self.draws.sum() / 2) / (len(self) * self.rounds))
+
+
+#`matches` separate matches of `rounds` rounds each between bot a and bot b.
+def play_match(a, b, rounds=1000, matches=1000, rng=None):
+    import numpy as np
+    rng = rng if rng is not None else np.random.default_rng()
+    a.start(matches, rng)
+    b.start(matches, rng)
+    #score is wins - losses, so wins = (rounds - draws + score) / 2.
+    score = np.zeros(matches, dtype=np.int64)
+    draws = np.zeros(matches, dtype=np.int64)
+    if hasattr(a, "moves") and hasattr(b, "moves"):
+        step = max(1, BLOCK // matches)
+        for start in range(0, rounds, step):
+            block = min(step, rounds - start)
+            results = outcomes(a.moves(block), b.moves(block))
+            score += results.sum(axis=0, dtype=np.int64)
+            draws += (results == 0).sum(axis=0)
+    else:
+        table = np.asarray(OUTCOMES, dtype=np.int8)
+        for _ in range(rounds):
+            move_a = a.move()
+            move_b = b.move()
+            results = table[move_a, move_b]
+            score += results
+            draws += results == 0
+            a.see(move_a, move_b)
+            b.see(move_b, move_a)
+    wins = (rounds - draws + score) // 2
+    return MatchResult(wins, rounds - draws - wins, draws, rounds)
+
+
+class Tournament:
+    def __init__(self, names, scores, win_rates, rounds, wall_seconds):
+        self.names = names
+        #scores[i, j] is bot i's points per round against bot j (1 win, 1/2 draw), win_rates the same
+        #for wins only. The diagonal is left empty (nan).
+        self.scores = scores
+        self.win_rates = win_rates
+        #Total rounds played over the whole tournament.
+        self.rounds = rounds
+        self.wall_seconds = wall_seconds
+
+    def throughput(self):
+        return self.rounds / self.wall_seconds
+
+    #(name, average points per round against everyone else), best first.
+    def standings(self):
+        import numpy as np
+        averages = np.nanmean(self.scores, axis=1)
+        return sorted(zip(self.names, averages.tolist()), key=lambda item: -item[1])
+
+    def __str__(self):
+        width = max(len(name) for name in self.names)
+        lines = [" " * width + "".join(f"{name:>12}" for name in self.names)]
+        for i, name in enumerate(self.names):
+            lines.append(f"{name:>{width}}" + "".join("{:>12}".format("-" if i == j else f"{score:.2%}")
+                                                      for j, score in enumerate(self.scores[i])))
+        return "\n".join(lines)
+
+
+def _run_pair(job):
+    a, b, rounds, matches, seq = job
+    import numpy as np
+    result = play_match(a, b, rounds, matches, np.random.default_rng(seq))
+    return result.score(), result.win_rate(), result.loss_rate()
+
+
+#Every bot against every other bot. bots is a list of bot objects (each needs its own .name).
+#Every pair gets its own random stream from the seed and the pair's position, so the table is
+#the same for any number of workers.
+def round_robin(bots, rounds=1000, matches=1000, seed=0, workers=1):
+    import numpy as np
+    n = len(bots)
+    pairs = [(i, j) for i in range(n) for j in range(i + 1, n)]
+    jobs = [(bots[i], bots[j], rounds, matches, np.random.SeedSequence(seed, spawn_key=(i, j))) for i, j in pairs]
+    start = time.perf_counter()
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_run_pair, jobs))
+    else:
+        results = list(map(_run_pair, jobs))
+    wall = time.perf_counter() - start
+    scores = np.full((n, n), np.nan)
+    win_rates = np.full((n, n), np.nan)
+    for (i, j), (score, wins, losses) in zip(pairs, results):
+        scores[i, j], scores[j, i] = score, 1 - score
+        win_rates[i, j], win_rates[j, i] = wins, losses
+    return Tournament([bot.name for bot in bots], scores, win_rates, len(pairs) * rounds * matches, wall)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rock paper scissors bot tournament")
+    parser.add_argument("--rounds", type=int, default=1000)
+    parser.add_argument("--matches", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    args = parser.parse_args()
+
+    import numpy as np
+
+    #HW17's elif chain and the table agree on every pair of moves.
+    def hw17(computer, player):
+        if computer == player:
+            return 0
+        return 1 if (computer, player) in ((1, 2), (2, 3), (3, 1)) else -1
+    print("Table matches HW17:", all(outcome(p - 1, c - 1) == hw17(c, p) for p in (1, 2, 3) for c in (1, 2, 3)))
+
+    rng = np.random.default_rng(args.seed)
+    n = 10_000_000
+    start = time.perf_counter()
+    a = rng.integers(0, 3, n, dtype=np.int8)
+    b = rng.integers(0, 3, n, dtype=np.int8)
+    wins = int((outcomes(a, b) == 1).sum())
+    print(f"{n:,} random rounds looked up in {time.perf_counter() - start:.2f}s, {wins / n:.4f} wins")
+
+    bots = [RandomBot(), FrequencyBot(), MarkovBot()]
+    tournament = round_robin(bots, args.rounds, args.matches, args.seed, args.workers)
+    print(f"\nRound robin, {args.matches:,} matches of {args.rounds:,} rounds per pair "
+          f"({tournament.rounds:,} rounds, {tournament.throughput():,.0f} rounds/s). Points per round, row vs column:")
+    print(tournament)
+    for name, points in tournament.standings():
+        print(f"{name:>10}: {points:.3f}")
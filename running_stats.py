@@ -0,0 +1,223 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Running statistics
+
+#Count, average, variance, min, max and rough quantiles of a stream of numbers in one pass,
+#without keeping the numbers. SC5's final_average, SC3's rating total and H6's num() all use it.
+# - The total is a compensated (Kahan/Neumaier) sum, so adding a billion small numbers doesn't
+#   lose the small ones, and mean is total / count like sum(list) / len(list).
+# - Variance uses Welford's update one number at a time, and Chan's formula to fold in whole
+#   chunks or another RunningStats, so it never subtracts two huge sums.
+# - Quantiles come from log-spaced buckets (each one relative_accuracy wide, 1% by default):
+#   quantile(q) is within 1% of the real value and the bucket count only grows with the log of
+#   the range of the numbers, not with how many there are.
+#Two RunningStats from different workers merge() into one as if it had seen everything.
+#Plain numbers only need the standard library. numpy arrays (or an iterator of them) get added
+#a whole chunk at a time.
+
+import math
+from itertools import chain, islice
+
+CHUNK = 1 << 16
+#Marks the end of an iterator in update().
+_END = object()
+
+
+class RunningStats:
+    def __init__(self, relative_accuracy=0.01):
+        self.count = 0
+        self.min = math.inf
+        self.max = -math.inf
+        self._sum = 0.0
+        self._carry = 0.0
+        self._mean = 0.0
+        self._m2 = 0.0
+        #relative_accuracy=None skips the quantile buckets.
+        self.relative_accuracy = relative_accuracy
+        self._positive = {}
+        self._negative = {}
+        self._zeros = 0
+        if relative_accuracy is not None:
+            self._log_gamma = math.log((1 + relative_accuracy) / (1 - relative_accuracy))
+
+    def __len__(self):
+        return self.count
+
+    def _add_to_sum(self, x):
+        total = self._sum + x
+        if abs(self._sum) >= abs(x):
+            self._carry += (self._sum - total) + x
+        else:
+            self._carry += (x - total) + self._sum
+        self._sum = total
+
+    #Bucket k holds magnitudes in (gamma^(k-1), gamma^k], positive and negative numbers separately.
+    def _bucket(self, x):
+        return math.ceil(math.log(abs(x)) / self._log_gamma)
+
+    def add(self, x):
+        x = float(x)
+        self.count += 1
+        self._add_to_sum(x)
+        delta = x - self._mean
+        self._mean += delta / self.count
+        self._m2 += delta * (x - self._mean)
+        self.min = min(self.min, x)
+        self.max = max(self.max, x)
+        if self.relative_accuracy is not None:
+            if x == 0:
+                self._zeros += 1
+            else:
+                buckets = self._positive if x > 0 else self._negative
+                key = self._bucket(x)
+                buckets[key] = buckets.get(key, 0) + 1
+        return self
+
+    #Adds everything from a numpy array, a list, an iterator of numbers, or an iterator of
+    #arrays (chunks). Chunks are added one at a time as they arrive, plain numbers are read
+    #CHUNK at a time, so memory stays flat however long the stream is.
+    def update(self, values):
+        if hasattr(values, "dtype"):
+            self._update_array(values)
+            return self
+        iterator = iter(values)
+        first = next(iterator, _END)
+        if first is _END:
+            return self
+        #A string has a length too, but it isn't a chunk of numbers.
+        if isinstance(first, (str, bytes)):
+            raise TypeError(f"RunningStats takes numbers, not {type(first).__name__}")
+        if hasattr(first, "__len__"):
+            self.update(first)
+            for part in iterator:
+                self.update(part)
+            return self
+        iterator = chain([first], iterator)
+        while True:
+            chunk = list(islice(iterator, CHUNK))
+            if not chunk:
+                return self
+            self._update_list(chunk)
+
+    def _update_list(self, chunk):
+        try:
+            import numpy as np
+        except ImportError:
+            for x in chunk:
+                self.add(x)
+            return
+        #Python numbers get an exact sum from math.fsum, arrays below use numpy's (pairwise) sum.
+        self._update_array(np.asarray(chunk, dtype=np.float64), math.fsum(chunk))
+
+    def _update_array(self, values, exact_sum=None):
+        import numpy as np
+        values = np.asarray(values, dtype=np.float64).ravel()
+        for start in range(0, values.size, CHUNK * 16):
+            part = values[start:start + CHUNK * 16]
+            other = RunningStats(None)
+            other.count = part.size
+            other._sum = exact_sum if exact_sum is not None else float(part.sum())
+            other._mean = other._sum / part.size
+            other._m2 = float(((part - other._mean) ** 2).sum())
+            other.min = float(part.min())
+            other.max = float(part.max())
+            self.merge(other)
+            if self.relative_accuracy is not None:
+                self._zeros += int((part == 0).sum())
+                for buckets, side in ((self._positive, part[part > 0]), (self._negative, -part[part < 0])):
+                    keys = np.ceil(np.log(side) / self._log_gamma).astype(np.int64)
+                    for key, count in zip(*np.unique(keys, return_counts=True)):
+                        buckets[int(key)] = buckets.get(int(key), 0) + int(count)
+
+    def merge(self, other):
+        if other.count == 0:
+            return self
+        if other.relative_accuracy is not None and self.relative_accuracy is not None:
+            if other.relative_accuracy != self.relative_accuracy:
+                raise ValueError("can only merge RunningStats with the same relative_accuracy")
+            for mine, theirs in ((self._positive, other._positive), (self._negative, other._negative)):
+                for key, count in theirs.items():
+                    mine[key] = mine.get(key, 0) + count
+            self._zeros += other._zeros
+        total = self.count + other.count
+        delta = other._mean - self._mean
+        self._m2 += other._m2 + delta * delta * self.count * other.count / total
+        self._mean += delta * other.count / total
+        self.count = total
+        self._add_to_sum(other._sum)
+        self._add_to_sum(other._carry)
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        return self
+
+    def __add__(self, other):
+        return RunningStats(self.relative_accuracy).merge(self).merge(other)
+
+    @property
+    def total(self):
+        return self._sum + self._carry
+
+    @property
+    def mean(self):
+        return self.total / self.count if self.count else 0.0
+
+    #Sample variance (divides by count - 1).
+    def variance(self):
+        return self._m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    def std(self):
+        return math.sqrt(self.variance())
+
+    #Roughly the value a fraction q of the way through the numbers in sorted order.
+    def quantile(self, q):
+        if self.relative_accuracy is None:
+            raise ValueError("this RunningStats was made without quantile buckets")
+        if self.count == 0:
+            return math.nan
+        rank = q * (self.count - 1)
+        gamma = math.exp(self._log_gamma)
+        seen = 0
+        #Most negative first, so the negative buckets go from the biggest magnitude down.
+        for key in sorted(self._negative, reverse=True):
+            seen += self._negative[key]
+            if seen > rank:
+                return min(max(-2 * gamma ** key / (gamma + 1), self.min), self.max)
+        seen += self._zeros
+        if seen > rank:
+            return 0.0
+        for key in sorted(self._positive):
+            seen += self._positive[key]
+            if seen > rank:
+                return max(min(2 * gamma ** key / (gamma + 1), self.max), self.min)
+        return self.max
+
+    def __repr__(self):
+        return (f"RunningStats(count={self.count}, mean={self.mean:.6g}, std={self.std():.6g}, "
+                f"min={self.min:.6g}, max={self.max:.6g})")
+
+
+if __name__ == "__main__":
+    import time
+    import numpy as np
+
+    #The classic case where a plain running total goes wrong: one big number and lots of small ones.
+    values = [1e16] + [1.0] * 1000
+    print(f"Plain total {sum(values) - 1e16:.0f}, compensated {RunningStats().update(values).total - 1e16:.0f} (should be 1000)")
+
+    #Numbers with a huge offset, where sum(x^2) - sum(x)^2 style variance falls apart.
+    data = 1e9 + np.random.default_rng(0).normal(0, 1, 1_000_000)
+    stats = RunningStats().update(data)
+    naive = (np.sum(data ** 2) - np.sum(data) ** 2 / data.size) / (data.size - 1)
+    print(f"Variance: naive {naive:.4f}, RunningStats {stats.variance():.4f}, numpy {data.var(ddof=1):.4f}")
+
+    #A billion-number stream in chunks, four "workers" merged together.
+    rng = np.random.default_rng(1)
+    start = time.perf_counter()
+    workers = [RunningStats() for _ in range(4)]
+    for i in range(100):
+        workers[i % 4].update(rng.exponential(10.0, 1_000_000))
+    merged = workers[0] + workers[1] + workers[2] + workers[3]
+    print(f"{merged.count:,} numbers in {time.perf_counter() - start:.2f}s: {merged}")
+    print(f"Median {merged.quantile(0.5):.3f} (exact {10 * math.log(2):.3f}), "
+          f"p99 {merged.quantile(0.99):.3f} (exact {10 * math.log(100):.3f}), "
+          f"{len(merged._positive)} buckets")
@@ -0,0 +1,204 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Character creation - stat roller
+
+#Rolls ability scores the SC4 way (4d6, drop the lowest, keep the other three, same as HW6's
+#judes_college_thing) for a lot of characters at once. There are only 6^4 = 1296 ways the four
+#dice can land, so the exact chance of every score from 3 to 18 is worked out once, and after that
+#a stat is one lookup into a table of all 1296 outcomes, the same trick dice.Dice uses for damage.
+#roll_stats(n) gives an (n, 6) array, one row per character.
+#
+#The exact numbers also answer SC5's question without rolling anything: the average stat is
+#stat_mean() = 15869/1296 (about 12.24), and block_sum_pmf() is the exact distribution of a whole
+#six-stat block's total.
+#
+#roll_fair_stats() only gives blocks whose total lands in a window (SC4's "average roughly 12-13"),
+#with every such block exactly as likely as it would be if you rerolled until one passed, but
+#without the rerolling. It first picks the total from the exact block-total distribution cut down
+#to the window, then picks the stats one at a time: given what's left to reach the total, stat
+#value s has weight (ways to roll s) * (ways the remaining stats can make up the rest).
+#It runs at the same speed however narrow the window is. For wide windows (SC4's 72-78 passes 38%
+#of the time) rerolling with roll_stats is still faster, the direct draw wins below ~15%.
+
+import time
+from fractions import Fraction
+from functools import lru_cache
+
+import numpy as np
+
+DICE = 4
+KEEP = 3
+SIDES = 6
+STATS = 6
+OUTCOMES = SIDES ** DICE
+
+
+#counts[k] = how many of the 1296 rolls give a score of k (k = 0..18, only 3..18 are nonzero).
+@lru_cache(maxsize=None)
+def stat_counts():
+    rolls = np.indices((SIDES,) * DICE).reshape(DICE, -1) + 1
+    scores = np.sort(rolls, axis=0)[DICE - KEEP:].sum(axis=0)
+    counts = np.bincount(scores, minlength=KEEP * SIDES + 1)
+    counts.flags.writeable = False
+    return counts
+
+
+#pmf[k] = exact chance of a score of k.
+def stat_pmf():
+    return stat_counts() / OUTCOMES
+
+
+#Exact average score, as a fraction.
+def stat_mean():
+    counts = stat_counts()
+    return Fraction(int((np.arange(counts.size) * counts).sum()), OUTCOMES)
+
+
+#Exact variance of one score, as a fraction.
+def stat_variance():
+    counts = stat_counts()
+    k = np.arange(counts.size)
+    mean = stat_mean()
+    return Fraction(int((k * k * counts).sum()), OUTCOMES) - mean * mean
+
+
+#counts[t] = how many of the 1296^stats equally likely blocks add up to t. int64 for up to 6 stats
+#(1296^6 still fits), Python ints past that.
+@lru_cache(maxsize=None)
+def block_sum_counts(stats=STATS):
+    counts = np.ones(1, dtype=np.int64 if stats <= 6 else object)
+    for _ in range(stats):
+        counts = np.convolve(counts, stat_counts().astype(counts.dtype))
+    counts.flags.writeable = False
+    return counts
+
+
+def block_sum_pmf(stats=STATS):
+    return block_sum_counts(stats) / OUTCOMES ** stats
+
+
+#Every one of the 1296 outcomes as a score, in sorted order, so a uniform index picks a fair score.
+@lru_cache(maxsize=None)
+def _table():
+    counts = stat_counts()
+    table = np.repeat(np.arange(counts.size, dtype=np.uint8), counts)
+    table.flags.writeable = False
+    return table
+
+
+#n characters' stats as an (n, stats) uint8 array. rng is a seed or a numpy Generator.
+def roll_stats(n, rng=None, stats=STATS):
+    rng = np.random.default_rng(rng)
+    return _table()[rng.integers(0, OUTCOMES, (n, stats), dtype=np.uint16)]
+
+
+#The block totals that average between low_average and high_average (12 and 13 by default).
+def average_window(low_average=12, high_average=13, stats=STATS):
+    return int(np.ceil(low_average * stats)), int(np.floor(high_average * stats))
+
+
+#For r stats still to roll that must add up to t, the chance of each value s for the next one
+#is weight(s) / total, weight(s) = (ways to roll s) * (ways r - 1 stats make t - s). All the
+#rows go into one sorted array: value s of row t starts at t + (weight of smaller values) / total,
+#so one searchsorted on left + uniform picks the next stat for every block at once.
+@lru_cache(maxsize=None)
+def _conditional_tables(stats=STATS):
+    score = [int(c) for c in stat_counts()]
+    tables = [None]
+    for r in range(1, stats + 1):
+        rest = [int(c) for c in block_sum_counts(r - 1)]
+        starts, values = [], []
+        for t in range((len(score) - 1) * r + 1):
+            weights = [score[s] * rest[t - s] if 0 <= t - s < len(rest) else 0 for s in range(len(score))]
+            total = sum(weights)
+            below = 0
+            for s, weight in enumerate(weights):
+                if weight:
+                    starts.append(t + below / total)
+                    values.append(s)
+                    below += weight
+        tables.append((np.array(starts), np.array(values, dtype=np.uint8)))
+    return tables
+
+
+#n blocks whose total is between low_total and high_total (inclusive), drawn straight from the
+#distribution SC4's stat_block has when you throw away every block outside the window.
+def roll_fair_stats(n, low_total, high_total, rng=None, stats=STATS):
+    rng = np.random.default_rng(rng)
+    totals = block_sum_counts(stats).astype(np.float64)
+    low = max(low_total, 0)
+    high = min(high_total, totals.size - 1)
+    window = np.cumsum(totals[low:high + 1]) if low <= high else np.zeros(0)
+    if window.size == 0 or window[-1] == 0:
+        raise ValueError(f"no block of {stats} stats can total between {low_total} and {high_total}")
+    left = low + np.searchsorted(window, rng.random(n) * window[-1], side="right")
+    blocks = np.empty((n, stats), dtype=np.uint8)
+    for i in range(stats):
+        starts, values = _conditional_tables(stats)[stats - i]
+        #Kept just under left + 1 so rounding can't spill into the next row.
+        point = np.minimum(left + rng.random(n), np.nextafter(left + 1.0, 0))
+        blocks[:, i] = values[np.searchsorted(starts, point, side="right") - 1]
+        left -= blocks[:, i]
+    return blocks
+
+
+#SC4's stat_block(), one character at a time, for comparison.
+def _sc4_block(rng):
+    block = []
+    for _ in range(STATS):
+        dice = [rng.randint(1, 6), rng.randint(1, 6), rng.randint(1, 6), rng.randint(1, 6)]
+        dice.sort(reverse=True)
+        block.append(dice[0] + dice[1] + dice[2])
+    return block
+
+
+if __name__ == "__main__":
+    import random
+
+    print("Score:  " + " ".join(f"{k:>5}" for k in range(3, 19)))
+    print("Chance: " + " ".join(f"{p:5.1%}" for p in stat_pmf()[3:]))
+    mean = stat_mean()
+    print(f"Average stat {mean} = {float(mean):.4f}, std {float(stat_variance()) ** 0.5:.4f}")
+
+    n = 10_000_000
+    start = time.perf_counter()
+    blocks = roll_stats(n, rng=1)
+    fast = time.perf_counter() - start
+    rng = random.Random(1)
+    loop_n = 100_000
+    start = time.perf_counter()
+    for _ in range(loop_n):
+        _sc4_block(rng)
+    slow = (time.perf_counter() - start) / loop_n * n
+    print(f"{n:,} stat blocks in {fast:.2f}s (the SC4 loop would take about {slow:.0f}s)")
+    seen = np.bincount(blocks.ravel(), minlength=19) / blocks.size
+    print(f"Biggest gap between rolled and exact chances: {np.abs(seen - stat_pmf()).max():.5f}")
+    print(f"Rolled average {blocks.mean():.4f}, exact {float(mean):.4f}")
+    low, high = average_window()
+    fair = block_sum_pmf()[low:high + 1].sum()
+    print(f"Chance a block averages 12-13 (total {low}-{high}): {fair:.2%}")
+
+    #Fair blocks: reroll until it passes (SC4 loop and numpy) vs drawing them directly.
+    print()
+    for low, high in ((72, 78), (75, 75), (90, 96)):
+        accept = block_sum_pmf()[low:high + 1].sum()
+        loop_n = max(1, int(2_000 * accept / 0.4))
+        start = time.perf_counter()
+        found = 0
+        while found < loop_n:
+            found += low <= sum(_sc4_block(rng)) <= high
+        loop_rate = loop_n / (time.perf_counter() - start)
+        start = time.perf_counter()
+        kept = 0
+        numpy_rng = np.random.default_rng(2)
+        while kept < 1_000_000:
+            totals = roll_stats(1_000_000, numpy_rng).sum(axis=1, dtype=np.int32)
+            kept += int(((totals >= low) & (totals <= high)).sum())
+        numpy_rate = kept / (time.perf_counter() - start)
+        start = time.perf_counter()
+        fair_blocks = roll_fair_stats(1_000_000, low, high, rng=3)
+        direct_rate = 1_000_000 / (time.perf_counter() - start)
+        totals = fair_blocks.sum(axis=1)
+        assert totals.min() >= low and totals.max() <= high
+        print(f"Totals {low}-{high} (pass rate {accept:.3%}): SC4 reroll {loop_rate:,.0f}/s, "
+              f"numpy reroll {numpy_rate:,.0f}/s, direct {direct_rate:,.0f}/s")
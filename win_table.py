@@ -0,0 +1,154 @@
+#Name: Bryson Crook
+#Class: 5th Hour
+#Assignment: Combat simulator - precomputed win chances
+
+#Answers "what's P(win)?" from a table on disk instead of running the solver every time.
+#
+#Because attacks don't depend on HP (see duel_solver), a duel is two independent "how many swings
+#until the target drops" curves. A curve only depends on:
+# - the d20 roll the attacker needs (AC - AtkMod, clamped to 2..20, since a 1 always misses and a
+#   20 always hits)
+# - the attacker's damage dice
+# - the target's HP
+#So the table stores kills[need, dice, hp - 1, m] = chance the target is down after m swings, for
+#every HP from 1 to 200 and every m up to MAX_SWINGS. Anything with AC 10-22 and AtkMod 0-10 falls
+#inside the table. A query reads two rows and combines them in initiative order, as long as the
+#fight is (almost) sure to be over within MAX_SWINGS swings.
+#
+#The table is a .npy file that gets memory mapped read only, so every process that opens it
+#shares the same pages instead of loading its own copy. Matchups outside the table (more HP,
+#dice not in the table) fall back to duel_solver.
+
+import argparse
+import json
+import os
+import time
+from functools import lru_cache
+
+import numpy as np
+
+import dice
+from duel_solver import attack_pmf, first_move_chance, solve_duel
+
+MAX_HP = 200
+MAX_SWINGS = 256
+#lookup() only answers when the chance of a fight outlasting the table is below this (the table is
+#float32, so anything much smaller would just be rounding).
+TOLERANCE = 1e-6
+NEEDS = range(2, 21)
+
+
+def default_dice():
+    from combatants import party, bestiary
+    return sorted({str(dice.compile(c.damage)) for c in list(party.values()) + list(bestiary.values())})
+
+
+#kills[hp - 1, m] for one attacker: chance a target with that HP is down after m swings.
+#Damage never goes down, so one pass over "total damage dealt" covers every HP at once.
+def kill_rows(pmf, max_hp=MAX_HP, max_swings=MAX_SWINGS):
+    rows = np.zeros((max_hp, max_swings + 1))
+    dealt = np.zeros(max_hp)
+    dealt[0] = 1.0
+    for m in range(1, max_swings + 1):
+        dealt = np.convolve(dealt, pmf)[:max_hp]
+        #Target with h HP is down once total damage >= h.
+        rows[:, m] = 1.0 - np.cumsum(dealt)
+    return np.clip(rows, 0.0, 1.0)
+
+
+def _meta_path(path):
+    return os.path.splitext(path)[0] + ".json"
+
+
+def build_table(path, dice_list=None, max_hp=MAX_HP, max_swings=MAX_SWINGS):
+    dice_list = [str(dice.compile(d)) for d in (dice_list or default_dice())]
+    table = np.lib.format.open_memmap(path, mode="w+", dtype=np.float32,
+                                      shape=(len(NEEDS), len(dice_list), max_hp, max_swings + 1))
+    for i, need in enumerate(NEEDS):
+        for j, expr in enumerate(dice_list):
+            table[i, j] = kill_rows(attack_pmf(0, need, expr), max_hp, max_swings)
+    table.flush()
+    del table
+    with open(_meta_path(path), "w") as f:
+        json.dump({"dice": dice_list, "max_hp": max_hp, "max_swings": max_swings}, f)
+
+
+@lru_cache(maxsize=None)
+def _first_move(init_a, init_b):
+    return first_move_chance(init_a, init_b)
+
+
+class WinTable:
+    def __init__(self, path):
+        with open(_meta_path(path)) as f:
+            meta = json.load(f)
+        self.dice = {expr: i for i, expr in enumerate(meta["dice"])}
+        self._columns = {}
+        self.max_hp = meta["max_hp"]
+        self.kills = np.load(path, mmap_mode="r")
+        self.lookups = 0
+        self.fallbacks = 0
+
+    def _row(self, attacker, target):
+        need = min(max(target.ac - attacker.atkmod, 2), 20)
+        column = self._dice_column(attacker.damage)
+        if column is None or not 1 <= target.HP <= self.max_hp:
+            return None
+        return self.kills[need - 2, column, target.HP - 1]
+
+    def _dice_column(self, damage):
+        if damage not in self._columns:
+            self._columns[damage] = self.dice.get(str(dice.compile(damage)))
+        return self._columns[damage]
+
+    #Chance the hero wins (None if the matchup isn't in the table).
+    def lookup(self, hero, villain):
+        villain_down = self._row(hero, villain)
+        hero_down = self._row(villain, hero)
+        if villain_down is None or hero_down is None:
+            return None
+        villain_down = villain_down.astype(np.float64)
+        hero_up = 1.0 - hero_down.astype(np.float64)
+        #The table stops after max_swings swings each. Everything it misses needs both sides still
+        #standing by then, and the two curves are independent, so that's the most the answer can be
+        #off by. Tanky, hard-to-hit matchups go to the solver instead.
+        if (1.0 - villain_down[-1]) * hero_up[-2] > TOLERANCE:
+            return None
+        p_first = _first_move(hero.init, villain.init)
+        dies = np.diff(villain_down)
+        #Swing m of the hero comes after m-1 villain swings if the hero goes first, after m if not.
+        return float(p_first * (dies @ hero_up[:-1]) + (1 - p_first) * (dies @ hero_up[1:]))
+
+    #Chance the hero wins, from the table when possible and the exact solver when not.
+    def p_win(self, hero, villain):
+        odds = self.lookup(hero, villain)
+        if odds is None:
+            self.fallbacks += 1
+            return solve_duel(hero, villain).hero_win
+        self.lookups += 1
+        return odds
+
+
+if __name__ == "__main__":
+    from combatants import party, bestiary
+    parser = argparse.ArgumentParser(description="Build or query the precomputed win chance table")
+    parser.add_argument("--path", default="win_table.npy")
+    parser.add_argument("--build", action="store_true", help="(re)build the table")
+    args = parser.parse_args()
+
+    if args.build or not os.path.exists(args.path):
+        start = time.perf_counter()
+        build_table(args.path)
+        print(f"Built {args.path} ({os.path.getsize(args.path) / 1e6:.0f} MB) "
+              f"in {time.perf_counter() - start:.1f}s")
+
+    table = WinTable(args.path)
+    pairs = [(h, v) for h in party.values() for v in bestiary.values()]
+    start = time.perf_counter()
+    for _ in range(100):
+        for hero, villain in pairs:
+            table.p_win(hero, villain)
+    per_query = (time.perf_counter() - start) / (100 * len(pairs))
+    print(f"{per_query * 1e6:.1f} us per query")
+    worst = max(abs(table.p_win(h, v) - solve_duel(h, v).hero_win) for h, v in pairs)
+    print(f"Largest difference from the exact solver: {worst:.2e}")